@@ -0,0 +1,422 @@
+"""
+Local benchmark suite for the Iris classification service.
+
+    python benchmark.py protocols     # HTTP/JSON vs gRPC throughput
+    python benchmark.py batch-memory  # peak RSS per row of batch responses
+    python benchmark.py tune          # workers x BLAS threads x batch size sweep
+    python benchmark.py client        # client SDK vs one connection per call
+
+By default the benchmark starts its own server (uvicorn with the in-process
+gRPC server enabled) and stops it afterwards. Pass --http-url/--grpc-target to
+benchmark servers that are already running.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from inference import FEATURE_NAMES, synthetic_features
+
+
+def rows_to_json(rows):
+    return [dict(zip(FEATURE_NAMES, row)) for row in rows.tolist()]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class LocalServer:
+    """uvicorn main:app in a subprocess, optionally with gRPC enabled"""
+
+    def __init__(self, grpc=False, env=None, workers=1):
+        self.workers = workers
+        self.http_port = free_port()
+        self.grpc_port = free_port() if grpc else None
+        self.env = dict(os.environ, **(env or {}))
+        if grpc:
+            self.env["IRIS_GRPC_PORT"] = str(self.grpc_port)
+        self.process = None
+
+    @property
+    def http_url(self):
+        return f"http://127.0.0.1:{self.http_port}"
+
+    @property
+    def grpc_target(self):
+        return f"127.0.0.1:{self.grpc_port}"
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app",
+             "--port", str(self.http_port), "--log-level", "warning",
+             "--workers", str(self.workers)],
+            env=self.env,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", self.http_port, timeout=1)
+                conn.request("GET", "/ready")
+                if conn.getresponse().status == 200:
+                    return self
+            except OSError:
+                pass
+            time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError("Server did not become ready within 30 seconds")
+
+    def __exit__(self, *exc):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+
+
+def run_load(call, n_requests, concurrency):
+    """Issue ``n_requests`` calls over ``concurrency`` threads, return latencies"""
+    per_worker = [n_requests // concurrency + (i < n_requests % concurrency) for i in range(concurrency)]
+
+    def worker(count):
+        state = {}
+        latencies = []
+        for _ in range(count):
+            start = time.perf_counter()
+            call(state)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, per_worker))
+    elapsed = time.perf_counter() - start
+    return np.concatenate([np.array(r) for r in results]), elapsed
+
+
+def report(name, latencies, elapsed, rows_per_request):
+    n = len(latencies)
+    print(
+        f"{name:<28} {n / elapsed:>10.1f} req/s {n * rows_per_request / elapsed:>12.0f} rows/s"
+        f"   p50 {np.percentile(latencies, 50) * 1000:>8.2f} ms"
+        f"   p99 {np.percentile(latencies, 99) * 1000:>8.2f} ms"
+    )
+
+
+def http_caller(base_url, path, payload):
+    """Keep-alive HTTP/JSON caller; one connection per benchmark thread"""
+    url = urllib.parse.urlsplit(base_url)
+    body = json.dumps(payload).encode()
+    headers = {"Content-Type": "application/json"}
+
+    def call(state):
+        conn = state.get("conn")
+        if conn is None:
+            conn = state["conn"] = http.client.HTTPConnection(url.hostname, url.port)
+        conn.request("POST", path, body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"{path} returned {response.status}")
+
+    return call
+
+
+def grpc_callers(target, rows):
+    import grpc
+    from grpc_server import iris_pb2, iris_pb2_grpc
+
+    channel = grpc.insecure_channel(target)
+    stub = iris_pb2_grpc.IrisClassifierStub(channel)
+    single = iris_pb2.Measurement(**dict(zip(FEATURE_NAMES, rows[0].tolist())))
+    batch = iris_pb2.BatchRequest(features=rows.ravel().tolist())
+
+    def predict(state):
+        stub.Predict(single)
+
+    def predict_batch(state):
+        stub.PredictBatch(batch)
+
+    return predict, predict_batch, stub, batch
+
+
+def benchmark_protocols(args):
+    rows = synthetic_features(args.batch_size)
+    single_payload = rows_to_json(rows[:1])[0]
+    batch_payload = rows_to_json(rows)
+
+    def run(http_url, grpc_target):
+        print(f"{args.requests} requests, concurrency {args.concurrency}, batch size {args.batch_size}\n")
+        cases = [
+            ("HTTP /predict", http_caller(http_url, "/predict", single_payload), 1),
+            ("HTTP /predict/batch", http_caller(http_url, "/predict/batch", batch_payload), args.batch_size),
+        ]
+        predict, predict_batch, stub, batch = grpc_callers(grpc_target, rows)
+        cases += [
+            ("gRPC Predict", predict, 1),
+            ("gRPC PredictBatch", predict_batch, args.batch_size),
+        ]
+        for name, call, rows_per_request in cases:
+            run_load(call, min(args.requests, 20), args.concurrency)  # warm-up
+            latencies, elapsed = run_load(call, args.requests, args.concurrency)
+            report(name, latencies, elapsed, rows_per_request)
+
+        # One bidirectional stream carrying every batch back to back
+        start = time.perf_counter()
+        responses = stub.PredictStream(iter([batch] * args.requests))
+        count = sum(1 for _ in responses)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{'gRPC PredictStream':<28} {count / elapsed:>10.1f} msg/s"
+            f" {count * args.batch_size / elapsed:>12.0f} rows/s"
+        )
+
+    if args.http_url and args.grpc_target:
+        run(args.http_url, args.grpc_target)
+    else:
+        with LocalServer(grpc=True) as server:
+            run(server.http_url, server.grpc_target)
+
+
+def peak_rss_bytes():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def batch_memory_child(mode, n_rows):
+    """Build one /predict/batch response body in this process and report its cost"""
+    from fastapi.encoders import jsonable_encoder
+    from main import PredictionOutput, engine
+
+    features = synthetic_features(n_rows)
+    engine.predict(features[:10])
+    baseline = peak_rss_bytes()
+
+    start = time.perf_counter()
+    batch = engine.predict(features)
+    if mode == "objects":
+        # Previous behaviour: one pydantic object per row, encoded in one go
+        predictions = [PredictionOutput(**row.to_dict()) for row in batch]
+        body = json.dumps(jsonable_encoder({"predictions": predictions})).encode()
+        size = len(body)
+    else:
+        size = sum(len(chunk) for chunk in batch.iter_json())
+    elapsed = time.perf_counter() - start
+
+    peak = peak_rss_bytes() - baseline
+    print(json.dumps({
+        "mode": mode,
+        "rows": n_rows,
+        "seconds": elapsed,
+        "response_bytes": size,
+        "peak_rss_bytes": peak,
+    }))
+
+
+def benchmark_batch_memory(args):
+    if args.child:
+        batch_memory_child(args.child, args.rows)
+        return
+
+    print(f"{args.rows} rows per batch response\n")
+    for mode in ("objects", "arrays"):
+        # Fresh interpreter per mode so peak RSS is not shared between them
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "batch-memory",
+             "--rows", str(args.rows), "--child", mode],
+            env=dict(os.environ, IRIS_WARMUP="0"),
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{mode:<10} {result['seconds'] * 1000:>10.1f} ms"
+            f" {result['rows'] / result['seconds']:>12.0f} rows/s"
+            f"   peak RSS {result['peak_rss_bytes'] / 2 ** 20:>8.1f} MB"
+            f"   {result['peak_rss_bytes'] / result['rows']:>8.1f} B/row"
+        )
+
+
+def benchmark_tune(args):
+    cpus = os.cpu_count() or 1
+    workers_options = args.workers or sorted({1, 2, 4, cpus} & set(range(1, cpus + 1)))
+    blas_options = args.blas_threads or sorted({1, 2, cpus} & set(range(1, cpus + 1)))
+    print(
+        f"{cpus} CPUs, target p99 {args.target_p99_ms:.1f} ms, "
+        f"{args.requests} /predict/batch requests per configuration\n"
+    )
+    print(f"{'workers':>7} {'blas':>5} {'batch':>6} {'rows/s':>12} {'p50 ms':>9} {'p99 ms':>9}")
+
+    results = []
+    for workers, blas_threads in itertools.product(workers_options, blas_options):
+        # Skip extra BLAS threads once workers x threads exceeds the cores
+        if blas_threads > 1 and workers * blas_threads > cpus and not args.oversubscribe:
+            continue
+        env = {
+            "IRIS_BLAS_THREADS": str(blas_threads),
+            "IRIS_INFERENCE_THREADS": str(args.inference_threads),
+            "WEB_CONCURRENCY": str(workers),
+            "IRIS_WARMUP": "1",
+        }
+        with LocalServer(env=env, workers=workers) as server:
+            for batch_size in args.batch_sizes:
+                call = http_caller(
+                    server.http_url, "/predict/batch", rows_to_json(synthetic_features(batch_size))
+                )
+                concurrency = args.concurrency or 2 * workers
+                run_load(call, min(args.requests, 20), concurrency)  # warm-up
+                latencies, elapsed = run_load(call, args.requests, concurrency)
+                result = {
+                    "workers": workers,
+                    "blas_threads": blas_threads,
+                    "batch_size": batch_size,
+                    "rows_per_second": len(latencies) * batch_size / elapsed,
+                    "p50_ms": float(np.percentile(latencies, 50) * 1000),
+                    "p99_ms": float(np.percentile(latencies, 99) * 1000),
+                }
+                results.append(result)
+                print(
+                    f"{workers:>7} {blas_threads:>5} {batch_size:>6} {result['rows_per_second']:>12.0f}"
+                    f" {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f}"
+                )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"target_p99_ms": args.target_p99_ms, "results": results}, f, indent=2)
+
+    eligible = [r for r in results if r["p99_ms"] <= args.target_p99_ms]
+    if not eligible:
+        print(f"\nNo configuration met the p99 target of {args.target_p99_ms:.1f} ms")
+        return
+    best = max(eligible, key=lambda r: r["rows_per_second"])
+    print(
+        f"\nRecommended: {best['workers']} workers, {best['blas_threads']} BLAS threads, "
+        f"batches of {best['batch_size']} rows "
+        f"({best['rows_per_second']:.0f} rows/s, p99 {best['p99_ms']:.2f} ms)"
+    )
+    print(
+        f"  WEB_CONCURRENCY={best['workers']} IRIS_BLAS_THREADS={best['blas_threads']} "
+        f"IRIS_INFERENCE_THREADS={args.inference_threads} uvicorn main:app"
+    )
+
+
+def naive_caller(base_url, payload):
+    """One new connection per call, as with bare requests.post"""
+    url = urllib.parse.urlsplit(base_url)
+    body = json.dumps(payload).encode()
+
+    def call(state):
+        conn = http.client.HTTPConnection(url.hostname, url.port)
+        conn.request("POST", "/predict", body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        conn.close()
+        if response.status != 200:
+            raise RuntimeError(f"/predict returned {response.status}")
+
+    return call
+
+
+def benchmark_client(args):
+    import asyncio
+    from client import AsyncIrisClient, IrisClient
+
+    rows = synthetic_features(args.rows)
+    payloads = rows_to_json(rows)
+
+    def run(base_url):
+        print(f"{args.rows} rows, {args.concurrency} concurrent callers\n")
+
+        latencies, elapsed = run_load(naive_caller(base_url, payloads[0]), args.rows, args.concurrency)
+        report("naive /predict per call", latencies, elapsed, 1)
+
+        with IrisClient(base_url, concurrency=args.connections) as iris:
+            latencies, elapsed = run_load(lambda state: iris.predict(payloads[0]), args.rows, args.concurrency)
+            report("IrisClient.predict", latencies, elapsed, 1)
+
+            for binary in (False, True):
+                iris.binary = binary
+                start = time.perf_counter()
+                iris.predict_proba(rows)
+                elapsed = time.perf_counter() - start
+                name = f"IrisClient.predict_proba ({'binary' if binary else 'json'})"
+                print(f"{name:<28} {'':>16} {args.rows / elapsed:>12.0f} rows/s")
+
+        async def run_async():
+            async with AsyncIrisClient(base_url, concurrency=args.connections) as iris:
+                semaphore = asyncio.Semaphore(args.concurrency)
+                latencies = []
+
+                async def one(payload):
+                    async with semaphore:
+                        start = time.perf_counter()
+                        await iris.predict(payload)
+                        latencies.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                await asyncio.gather(*[one(payload) for payload in payloads])
+                return np.array(latencies), time.perf_counter() - start
+
+        latencies, elapsed = asyncio.run(run_async())
+        report("AsyncIrisClient.predict", latencies, elapsed, 1)
+
+    if args.http_url:
+        run(args.http_url)
+    else:
+        with LocalServer() as server:
+            run(server.http_url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Iris classification benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    protocols = subparsers.add_parser("protocols", help="HTTP/JSON vs gRPC throughput")
+    protocols.add_argument("--requests", type=int, default=2000)
+    protocols.add_argument("--concurrency", type=int, default=4)
+    protocols.add_argument("--batch-size", type=int, default=100)
+    protocols.add_argument("--http-url", help="Use a running HTTP server instead of starting one")
+    protocols.add_argument("--grpc-target", help="Use a running gRPC server, e.g. localhost:50051")
+    protocols.set_defaults(func=benchmark_protocols)
+
+    batch_memory = subparsers.add_parser("batch-memory", help="Peak RSS per row of /predict/batch responses")
+    batch_memory.add_argument("--rows", type=int, default=1_000_000)
+    batch_memory.add_argument("--child", choices=["objects", "arrays"], help=argparse.SUPPRESS)
+    batch_memory.set_defaults(func=benchmark_batch_memory)
+
+    tune = subparsers.add_parser("tune", help="Find the best workers/BLAS threads/batch size under a p99 target")
+    tune.add_argument("--target-p99-ms", type=float, default=50.0)
+    tune.add_argument("--requests", type=int, default=500)
+    tune.add_argument("--workers", type=int, nargs="+", help="Worker counts to try (default: 1, 2, 4, cores)")
+    tune.add_argument("--blas-threads", type=int, nargs="+", help="BLAS thread counts to try (default: 1, 2, cores)")
+    tune.add_argument("--batch-sizes", type=int, nargs="+", default=[32, 256, 1024])
+    tune.add_argument("--inference-threads", type=int, default=0, help="IRIS_INFERENCE_THREADS for every run")
+    tune.add_argument("--concurrency", type=int, help="Client threads (default: 2 per worker)")
+    tune.add_argument("--oversubscribe", action="store_true", help="Also try workers x BLAS threads > cores")
+    tune.add_argument("--output", help="Write every measurement to this JSON file")
+    tune.set_defaults(func=benchmark_tune)
+
+    client = subparsers.add_parser("client", help="Client SDK vs one connection per call")
+    client.add_argument("--rows", type=int, default=5000)
+    client.add_argument("--concurrency", type=int, default=64, help="Concurrent callers")
+    client.add_argument("--connections", type=int, default=4, help="Client connection pool size")
+    client.add_argument("--http-url", help="Use a running HTTP server instead of starting one")
+    client.set_defaults(func=benchmark_client)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+"""
+Python client for the Iris classification API.
+
+    from client import IrisClient
+
+    with IrisClient("http://localhost:8000") as iris:
+        iris.predict({"sepal_length": 5.1, "sepal_width": 3.5,
+                      "petal_length": 1.4, "petal_width": 0.2})
+        iris.predict_batch(rows)      # list of prediction dicts
+        iris.predict_proba(matrix)    # (n, 3) NumPy array
+
+``AsyncIrisClient`` offers the same methods as coroutines.
+
+Both clients keep a pool of keep-alive connections. Single predictions are
+coalesced: while ``concurrency`` batch requests are in flight, new rows queue
+up and go out together in the next /predict/batch call, so a lone caller
+pays no extra latency and many concurrent callers share requests. Each row
+is validated before it is queued, and a coalesced request rejected with 422
+is resent row by row, so a bad row only fails the caller who sent it.
+Connection errors and 429, 502, 503 and 504 responses are retried with
+exponential backoff and full jitter; other errors (including 500) are raised
+at once. With ``binary=True`` matrices are sent to /predict/binary as packed
+float64 rows when the server supports it, falling back to JSON otherwise.
+"""
+import asyncio
+import math
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import httpx
+import numpy as np
+
+# Same names and range the server validates against; defined here so the
+# client does not need the server's modules
+FEATURE_NAMES = ["sepal_length", "sepal_width", "petal_length", "petal_width"]
+MIN_MEASUREMENT = 0.0
+MAX_MEASUREMENT = 10.0
+
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+
+class IrisClientError(Exception):
+    """The server rejected a request or kept failing after every retry"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, retries=3, backoff=0.05, max_backoff=2.0):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+def _row_dict(row):
+    if isinstance(row, dict):
+        return {name: row[name] for name in FEATURE_NAMES}
+    return dict(zip(FEATURE_NAMES, (float(value) for value in row)))
+
+
+def _validated_row(row):
+    """Measurement dict for one row, raising IrisClientError (422) if the server would reject it"""
+    if isinstance(row, dict):
+        missing = [name for name in FEATURE_NAMES if name not in row]
+        if missing:
+            raise IrisClientError(f"422: Missing measurement(s): {', '.join(missing)}", 422)
+        values = [row[name] for name in FEATURE_NAMES]
+    else:
+        values = list(row)
+        if len(values) != len(FEATURE_NAMES):
+            raise IrisClientError(f"422: Expected {len(FEATURE_NAMES)} measurements, got {len(values)}", 422)
+    try:
+        values = [float(value) for value in values]
+    except (TypeError, ValueError):
+        raise IrisClientError("422: Measurements must be numbers", 422)
+    if not all(math.isfinite(value) and MIN_MEASUREMENT <= value <= MAX_MEASUREMENT for value in values):
+        raise IrisClientError("422: Measurements must be between 0 and 10 cm", 422)
+    return dict(zip(FEATURE_NAMES, values))
+
+
+def _as_matrix(rows):
+    if isinstance(rows, np.ndarray):
+        return rows.astype("<f8", copy=False).reshape(-1, len(FEATURE_NAMES))
+    return np.array(
+        [[row[name] for name in FEATURE_NAMES] if isinstance(row, dict) else row for row in rows],
+        dtype="<f8",
+    ).reshape(-1, len(FEATURE_NAMES))
+
+
+def _chunks(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def _should_retry(response):
+    return response.status_code in RETRY_STATUS_CODES
+
+
+def _raise_for_status(response):
+    if response.status_code >= 400:
+        try:
+            detail = response.json().get("detail")
+        except ValueError:
+            detail = response.text
+        raise IrisClientError(f"{response.status_code}: {detail}", response.status_code)
+
+
+def _decode_binary(response):
+    class_names = response.headers["x-iris-classes"].split(",")
+    probabilities = np.frombuffer(response.content, dtype="<f8").reshape(-1, len(class_names))
+    return probabilities, class_names
+
+
+class IrisClient:
+    """Synchronous client with connection pooling, coalescing and retries"""
+
+    def __init__(self, base_url="http://localhost:8000", concurrency=4, max_batch_size=1024,
+                 retry=None, timeout=10.0, binary=False):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.max_batch_size = max_batch_size
+        self.retry = retry or RetryPolicy()
+        self.binary = binary
+        self.class_names = None
+        self._http = httpx.Client(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        self._senders = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="iris-client")
+        self._slots = threading.Semaphore(concurrency)
+        self._pending = queue.SimpleQueue()
+        self._dispatcher = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._pending.put(None)
+        self._senders.shutdown(wait=True)
+        self._http.close()
+
+    def _request(self, path, **kwargs):
+        for attempt in range(self.retry.retries + 1):
+            try:
+                response = self._http.post(path, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == self.retry.retries:
+                    raise IrisClientError(f"{path} failed: {e}") from e
+            else:
+                if not _should_retry(response) or attempt == self.retry.retries:
+                    _raise_for_status(response)
+                    return response
+            time.sleep(self.retry.delay(attempt))
+
+    def _post_batch(self, rows):
+        return self._request("/predict/batch", json=rows).json()["predictions"]
+
+    def predict(self, row):
+        """Classify one flower; concurrent calls are coalesced into batch requests"""
+        with self._lock:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="iris-client-batcher", daemon=True)
+                self._dispatcher.start()
+        row = _validated_row(row)
+        future = Future()
+        self._pending.put((row, future))
+        return future.result()
+
+    def _dispatch(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            # Rows keep queueing while every sender slot is busy
+            self._slots.acquire()
+            items = [item]
+            while len(items) < self.max_batch_size:
+                try:
+                    item = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._pending.put(None)
+                    break
+                items.append(item)
+            self._senders.submit(self._send_coalesced, items)
+
+    def _send_coalesced(self, items):
+        try:
+            predictions = self._post_batch([row for row, _ in items])
+            for (_, future), prediction in zip(items, predictions):
+                future.set_result(prediction)
+        except IrisClientError as e:
+            if e.status_code == 422 and len(items) > 1:
+                # Find the rejected rows so only their callers see the error
+                for item in items:
+                    self._send_coalesced_row(item)
+            else:
+                for _, future in items:
+                    future.set_exception(e)
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    def _send_coalesced_row(self, item):
+        row, future = item
+        try:
+            future.set_result(self._post_batch([row])[0])
+        except Exception as e:
+            future.set_exception(e)
+
+    def predict_batch(self, rows):
+        """Classify many flowers, split into at most ``concurrency`` parallel requests"""
+        chunks = _chunks([_row_dict(row) for row in rows], self.max_batch_size)
+        results = []
+        for predictions in self._senders.map(self._post_batch, chunks):
+            results.extend(predictions)
+        return results
+
+    def predict_proba(self, rows):
+        """Return the (n, classes) probability matrix; sets ``class_names``"""
+        matrix = _as_matrix(rows)
+        results = list(self._senders.map(self._proba_chunk, _chunks(matrix, self.max_batch_size)))
+        if not results:
+            return np.empty((0, len(self.class_names or ())))
+        return np.vstack(results)
+
+    def _proba_chunk(self, matrix):
+        if self.binary:
+            try:
+                response = self._request(
+                    "/predict/binary",
+                    content=matrix.tobytes(),
+                    headers={"Content-Type": "application/octet-stream"},
+                )
+                probabilities, self.class_names = _decode_binary(response)
+                return probabilities
+            except IrisClientError as e:
+                if e.status_code not in (404, 405, 415):
+                    raise
+                # Older server without the binary endpoint
+                self.binary = False
+        predictions = self._post_batch([_row_dict(row) for row in matrix.tolist()])
+        if predictions:
+            self.class_names = list(predictions[0]["probabilities"])
+        return np.array([[p["probabilities"][name] for name in self.class_names] for p in predictions])
+
+
+class AsyncIrisClient:
+    """asyncio client with connection pooling, coalescing and retries"""
+
+    def __init__(self, base_url="http://localhost:8000", concurrency=4, max_batch_size=1024,
+                 retry=None, timeout=10.0, binary=False):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.max_batch_size = max_batch_size
+        self.retry = retry or RetryPolicy()
+        self.binary = binary
+        self.class_names = None
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        self._slots = asyncio.Semaphore(concurrency)
+        self._pending = []
+        self._dispatching = False
+        self._tasks = set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self._http.aclose()
+
+    async def _request(self, path, **kwargs):
+        for attempt in range(self.retry.retries + 1):
+            try:
+                response = await self._http.post(path, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == self.retry.retries:
+                    raise IrisClientError(f"{path} failed: {e}") from e
+            else:
+                if not _should_retry(response) or attempt == self.retry.retries:
+                    _raise_for_status(response)
+                    return response
+            await asyncio.sleep(self.retry.delay(attempt))
+
+    async def _post_batch(self, rows):
+        async with self._slots:
+            response = await self._request("/predict/batch", json=rows)
+        return response.json()["predictions"]
+
+    async def predict(self, row):
+        """Classify one flower; concurrent calls are coalesced into batch requests"""
+        row = _validated_row(row)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((row, future))
+        if not self._dispatching:
+            self._dispatching = True
+            self._spawn(self._dispatch())
+        return await future
+
+    def _spawn(self, coroutine):
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self):
+        try:
+            while self._pending:
+                # Rows keep queueing while every sender slot is busy
+                await self._slots.acquire()
+                items = self._pending[:self.max_batch_size]
+                del self._pending[:self.max_batch_size]
+                self._spawn(self._send_coalesced(items))
+                await asyncio.sleep(0)
+        finally:
+            self._dispatching = False
+
+    async def _send_coalesced(self, items):
+        try:
+            response = await self._request("/predict/batch", json=[row for row, _ in items])
+            for (_, future), prediction in zip(items, response.json()["predictions"]):
+                if not future.done():
+                    future.set_result(prediction)
+        except IrisClientError as e:
+            if e.status_code == 422 and len(items) > 1:
+                # Find the rejected rows so only their callers see the error
+                for item in items:
+                    await self._send_coalesced_row(item)
+            else:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    async def _send_coalesced_row(self, item):
+        row, future = item
+        try:
+            response = await self._request("/predict/batch", json=[row])
+            prediction = response.json()["predictions"][0]
+            if not future.done():
+                future.set_result(prediction)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+
+    async def predict_batch(self, rows):
+        """Classify many flowers, split into at most ``concurrency`` parallel requests"""
+        chunks = _chunks([_row_dict(row) for row in rows], self.max_batch_size)
+        results = []
+        for predictions in await asyncio.gather(*[self._post_batch(chunk) for chunk in chunks]):
+            results.extend(predictions)
+        return results
+
+    async def predict_proba(self, rows):
+        """Return the (n, classes) probability matrix; sets ``class_names``"""
+        matrix = _as_matrix(rows)
+        chunks = _chunks(matrix, self.max_batch_size)
+        results = await asyncio.gather(*[self._proba_chunk(chunk) for chunk in chunks])
+        if not results:
+            return np.empty((0, len(self.class_names or ())))
+        return np.vstack(results)
+
+    async def _proba_chunk(self, matrix):
+        if self.binary:
+            try:
+                async with self._slots:
+                    response = await self._request(
+                        "/predict/binary",
+                        content=matrix.tobytes(),
+                        headers={"Content-Type": "application/octet-stream"},
+                    )
+                probabilities, self.class_names = _decode_binary(response)
+                return probabilities
+            except IrisClientError as e:
+                if e.status_code not in (404, 405, 415):
+                    raise
+                # Older server without the binary endpoint
+                self.binary = False
+        predictions = await self._post_batch([_row_dict(row) for row in matrix.tolist()])
+        if predictions:
+            self.class_names = list(predictions[0]["probabilities"])
+        return np.array([[p["probabilities"][name] for name in self.class_names] for p in predictions])
@@ -0,0 +1,90 @@
+"""
+Native thread-pool control for inference.
+
+NumPy and scikit-learn run on BLAS/OpenMP libraries that each start one thread
+per core. With several uvicorn workers (or an inference executor with several
+threads) every worker does this, oversubscribing the cores. The limits here
+are applied once per worker process through threadpoolctl:
+
+    IRIS_BLAS_THREADS       native threads per worker (default: cores / WEB_CONCURRENCY)
+    IRIS_INFERENCE_THREADS  threads running batch inference off the event loop
+                            (default 0: score inline on the event loop)
+
+threadpoolctl limits are process-wide, so an inference executor with N
+threads can use up to N * IRIS_BLAS_THREADS native threads. Jobs submitted
+by a profiled request are sampled on the executor thread that runs them.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from threadpoolctl import threadpool_info, threadpool_limits
+
+# Read at load time by native libraries that are not imported yet
+NATIVE_THREAD_VARIABLES = (
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS",
+)
+
+
+class ThreadConfig:
+    """Native thread limits for this worker plus an optional inference executor"""
+
+    def __init__(self, blas_threads=None, inference_threads=0, profiler=None):
+        self.blas_threads = blas_threads
+        self.inference_threads = inference_threads
+        self.profiler = profiler
+        self._limiter = None
+        self._executor = None
+        if inference_threads > 0:
+            self._executor = ThreadPoolExecutor(
+                max_workers=inference_threads, thread_name_prefix="iris-inference"
+            )
+
+    @classmethod
+    def from_env(cls, profiler=None):
+        """Build from IRIS_BLAS_THREADS, IRIS_INFERENCE_THREADS and WEB_CONCURRENCY"""
+        blas_threads = os.environ.get("IRIS_BLAS_THREADS")
+        if blas_threads:
+            blas_threads = int(blas_threads)
+        else:
+            # uvicorn reads WEB_CONCURRENCY as its default --workers
+            workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+            blas_threads = max(1, (os.cpu_count() or 1) // workers)
+        return cls(
+            blas_threads=blas_threads,
+            inference_threads=int(os.environ.get("IRIS_INFERENCE_THREADS", "0")),
+            profiler=profiler,
+        )
+
+    def apply(self):
+        """Limit native pools already loaded and those loaded later in this process"""
+        if self.blas_threads is None:
+            return
+        for name in NATIVE_THREAD_VARIABLES:
+            os.environ.setdefault(name, str(self.blas_threads))
+        self._limiter = threadpool_limits(limits=self.blas_threads)
+
+    async def run(self, func, *args):
+        """Call ``func(*args)`` on the inference executor, or inline without one"""
+        if self._executor is None:
+            return func(*args)
+        if self.profiler is not None:
+            func = self.profiler.bind(func)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def status(self):
+        return {
+            "blas_threads": self.blas_threads,
+            "inference_threads": self.inference_threads,
+            "cpu_count": os.cpu_count(),
+            "native_pools": [
+                {
+                    "user_api": pool["user_api"],
+                    "internal_api": pool["internal_api"],
+                    "num_threads": pool["num_threads"],
+                    "library": os.path.basename(pool["filepath"]),
+                }
+                for pool in threadpool_info()
+            ],
+        }
@@ -0,0 +1,30 @@
+"""
+Custom estimators exported as serving artifacts.
+
+They live in their own module so that pickled models refer to an importable
+class, whichever script trained them.
+"""
+import numpy as np
+from sklearn.neighbors import NearestCentroid
+
+from online import softmax
+
+
+class SoftmaxNearestCentroid(NearestCentroid):
+    """
+    Nearest centroid with probabilities, which the serving engine needs.
+
+    Class probabilities are a softmax over negative squared distances to the
+    centroids, scaled by the pooled within-class variance.
+    """
+
+    def fit(self, X, y):
+        super().fit(X, y)
+        residuals = X - self.centroids_[np.searchsorted(self.classes_, y)]
+        self.variance_ = max(float((residuals ** 2).mean()), 1e-12)
+        return self
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=float)
+        distances = ((X[:, None, :] - self.centroids_[None, :, :]) ** 2).sum(axis=2)
+        return softmax(-distances / (2 * self.variance_))
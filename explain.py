@@ -0,0 +1,93 @@
+"""
+Per-feature contribution explanations for linear classifiers.
+
+For a linear model the logit of class k is ``intercept[k] + sum_j coef[k, j] * x[j]``,
+so the contribution of feature j to class k is simply ``coef[k, j] * x[j]``.
+Everything below works on whole (n, n_features) matrices at once.
+"""
+import numpy as np
+
+
+def supports_explanations(model):
+    """Whether ``model`` is a multi-class linear model that explain_matrix can decompose"""
+    coef = getattr(model, "coef_", None)
+    return coef is not None and coef.ndim == 2 and coef.shape[0] >= 2
+
+
+def explain_matrix(model, X):
+    """
+    Compute contributions, logits and runner-up margins for every row of ``X``.
+
+    Returns a dict of arrays:
+
+    - ``contributions``: (n, n_classes, n_features) per-class feature contributions
+    - ``logits``: (n, n_classes) decision values
+    - ``probabilities``: (n, n_classes) model probabilities
+    - ``predictions`` / ``runner_up``: (n,) top and second class indices
+    - ``margin``: (n,) logit difference between predicted class and runner-up
+    - ``margin_contributions``: (n, n_features) per-feature share of the margin
+    """
+    if not supports_explanations(model):
+        raise ValueError("Explanations require a multi-class linear model with coef_")
+    coef = model.coef_
+
+    contributions = X[:, np.newaxis, :] * coef[np.newaxis, :, :]
+    logits = contributions.sum(axis=2) + model.intercept_
+    probabilities = model.predict_proba(X)
+
+    top_two = np.argsort(logits, axis=1)[:, -2:]
+    predictions = top_two[:, 1]
+    runner_up = top_two[:, 0]
+    rows = np.arange(X.shape[0])
+    margin = logits[rows, predictions] - logits[rows, runner_up]
+    margin_contributions = contributions[rows, predictions] - contributions[rows, runner_up]
+
+    return {
+        "contributions": contributions,
+        "logits": logits,
+        "probabilities": probabilities,
+        "predictions": predictions,
+        "runner_up": runner_up,
+        "margin": margin,
+        "margin_contributions": margin_contributions,
+    }
+
+
+def format_intercepts(intercept, class_names):
+    """Intercept term for each class as a JSON-ready dict"""
+    return dict(zip(class_names, intercept.tolist()))
+
+
+def format_explanations(result, intercept, class_names, feature_names, include_intercepts=True):
+    """
+    Turn the arrays from explain_matrix into one JSON-ready dict per row.
+
+    With ``include_intercepts=False`` the rows omit the (constant) intercepts,
+    for responses that report them once.
+    """
+    intercepts = format_intercepts(intercept, class_names)
+    contributions = result["contributions"].tolist()
+    margin_contributions = result["margin_contributions"].tolist()
+    probabilities = result["probabilities"].tolist()
+    logits = result["logits"].tolist()
+
+    explanations = []
+    for i, (prediction, runner_up) in enumerate(
+        zip(result["predictions"].tolist(), result["runner_up"].tolist())
+    ):
+        explanation = {
+            "species": class_names[prediction],
+            "confidence": probabilities[i][prediction],
+            "runner_up": class_names[runner_up],
+            "margin": logits[i][prediction] - logits[i][runner_up],
+            "logits": dict(zip(class_names, logits[i])),
+            "contributions": {
+                name: dict(zip(feature_names, row))
+                for name, row in zip(class_names, contributions[i])
+            },
+            "margin_contributions": dict(zip(feature_names, margin_contributions[i])),
+        }
+        if include_intercepts:
+            explanation["intercepts"] = intercepts
+        explanations.append(explanation)
+    return explanations
@@ -0,0 +1,142 @@
+"""
+gRPC inference service for high-QPS internal callers.
+
+Serves the IrisClassifier service from iris.proto using the shared inference
+core, so predictions, validation rules and class names match the HTTP API.
+Runs inside the FastAPI process when IRIS_GRPC_PORT is set, or on its own:
+
+    python grpc_server.py --port 50051
+
+Message classes are generated from iris.proto at import time (requires
+grpcio-tools), so there are no generated stubs to keep in sync.
+"""
+import argparse
+import os
+import sys
+from concurrent import futures
+
+import grpc
+import numpy as np
+
+from inference import (
+    FEATURE_NAMES, BatchPrediction, InferenceEngine, synthetic_features, validate_features
+)
+from warmup import WARMUP_METADATA
+
+_PROTO_DIR = os.path.dirname(os.path.abspath(__file__))
+if _PROTO_DIR not in sys.path:
+    sys.path.append(_PROTO_DIR)
+
+iris_pb2, iris_pb2_grpc = grpc.protos_and_services("iris.proto")
+
+
+class IrisClassifierServicer(iris_pb2_grpc.IrisClassifierServicer):
+    """Implements the IrisClassifier RPCs on top of an InferenceEngine"""
+
+    def __init__(self, engine, observer=None):
+        self.engine = engine
+        self.observer = observer
+
+    def _score(self, features, context):
+        try:
+            validate_features(features)
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        if features.shape[0] == 0:
+            return BatchPrediction.empty(self.engine.class_names)
+        batch = self.engine.predict(features)
+        if self.observer is not None and WARMUP_METADATA not in context.invocation_metadata():
+            self.observer(features, batch)
+        return batch
+
+    def _batch_response(self, features, context, sequence=0):
+        if len(features) % len(FEATURE_NAMES):
+            context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                f"Feature count must be a multiple of {len(FEATURE_NAMES)}"
+            )
+        matrix = np.array(features, dtype=float).reshape(-1, len(FEATURE_NAMES))
+        batch = self._score(matrix, context)
+        return iris_pb2.BatchResponse(
+            class_index=batch.predictions.tolist(),
+            probabilities=batch.probabilities.ravel().tolist(),
+            class_names=batch.class_names,
+            sequence=sequence,
+        )
+
+    def Predict(self, request, context):
+        features = np.array([[
+            request.sepal_length,
+            request.sepal_width,
+            request.petal_length,
+            request.petal_width,
+        ]])
+        result = self._score(features, context)[0]
+        return iris_pb2.Prediction(
+            species=result.species,
+            confidence=result.confidence,
+            probabilities=result.probabilities,
+        )
+
+    def PredictBatch(self, request, context):
+        return self._batch_response(request.features, context)
+
+    def PredictStream(self, request_iterator, context):
+        for request in request_iterator:
+            yield self._batch_response(request.features, context, request.sequence)
+
+
+def create_server(engine, port=50051, max_workers=None, observer=None):
+    """
+    Build (but do not start) a gRPC server bound to ``port``.
+
+    ``observer`` is called with (features, BatchPrediction) after every
+    scored request, e.g. to feed drift statistics.
+    """
+    if max_workers is None:
+        max_workers = int(os.environ.get("IRIS_GRPC_WORKERS", "8"))
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="iris-grpc"),
+        options=[
+            ("grpc.max_receive_message_length", 64 * 1024 * 1024),
+            ("grpc.max_send_message_length", 64 * 1024 * 1024),
+        ],
+    )
+    iris_pb2_grpc.add_IrisClassifierServicer_to_server(
+        IrisClassifierServicer(engine, observer), server
+    )
+    server.add_insecure_port(f"[::]:{port}")
+    return server
+
+
+def warm_up(target, features):
+    """Exercise every RPC of a running server once with warm-up metadata"""
+    with grpc.insecure_channel(target) as channel:
+        stub = iris_pb2_grpc.IrisClassifierStub(channel)
+        metadata = [WARMUP_METADATA]
+        batch = iris_pb2.BatchRequest(features=features.ravel().tolist())
+        stub.Predict(
+            iris_pb2.Measurement(**dict(zip(FEATURE_NAMES, features[0].tolist()))),
+            metadata=metadata
+        )
+        stub.PredictBatch(batch, metadata=metadata)
+        for _ in stub.PredictStream(iter([batch]), metadata=metadata):
+            pass
+
+
+def serve(port=50051, model_path="model.pkl", max_workers=None):
+    """Run a standalone gRPC server until interrupted"""
+    server = create_server(InferenceEngine.load(model_path), port, max_workers)
+    server.start()
+    warm_up(f"127.0.0.1:{port}", synthetic_features(256))
+    print(f"gRPC server listening on port {port}")
+    server.wait_for_termination()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Iris classification gRPC server")
+    parser.add_argument("--port", type=int, default=50051)
+    parser.add_argument("--model", default="model.pkl")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    serve(args.port, args.model, args.workers)
@@ -0,0 +1,222 @@
+"""
+Shared inference core for the HTTP (main.py) and gRPC (grpc_server.py) servers.
+
+Both front ends validate against the same measurement rules, score through the
+same InferenceEngine and report the same class names.
+"""
+import hashlib
+import json
+
+import joblib
+import numpy as np
+
+FEATURE_NAMES = ["sepal_length", "sepal_width", "petal_length", "petal_width"]
+CLASS_NAMES = ["setosa", "versicolor", "virginica"]
+
+# Valid measurement range in cm, shared with the pydantic IrisInput model
+MIN_MEASUREMENT = 0.0
+MAX_MEASUREMENT = 10.0
+MEASUREMENT_ERROR = "Measurements must be between 0 and 10 cm"
+
+# Observed range of each feature in the Iris training data
+TRAINING_LOW = np.array([4.3, 2.0, 1.0, 0.1])
+TRAINING_HIGH = np.array([7.9, 4.4, 6.9, 2.5])
+
+
+def synthetic_features(n, seed=0):
+    """Random (n, 4) measurements within the training ranges, for warm-up and benchmarks"""
+    rng = np.random.RandomState(seed)
+    return np.round(rng.uniform(TRAINING_LOW, TRAINING_HIGH, size=(n, len(FEATURE_NAMES))), 1)
+
+
+def validate_features(features):
+    """
+    Check an (n, 4) feature matrix against the API's validation rules.
+
+    Raises ValueError with the same message the HTTP API reports.
+    """
+    if features.ndim != 2 or features.shape[1] != len(FEATURE_NAMES):
+        raise ValueError(f"Expected rows of {len(FEATURE_NAMES)} measurements")
+    if not np.isfinite(features).all():
+        raise ValueError(MEASUREMENT_ERROR)
+    if features.size and (features.min() < MIN_MEASUREMENT or features.max() > MAX_MEASUREMENT):
+        raise ValueError(MEASUREMENT_ERROR)
+    return features
+
+
+class PredictionView:
+    """Lazy view of one row of a BatchPrediction"""
+
+    __slots__ = ("batch", "index")
+
+    def __init__(self, batch, index):
+        self.batch = batch
+        self.index = index
+
+    @property
+    def class_index(self):
+        return int(self.batch.predictions[self.index])
+
+    @property
+    def species(self):
+        return self.batch.class_names[self.class_index]
+
+    @property
+    def confidence(self):
+        return float(self.batch.probabilities[self.index, self.class_index])
+
+    @property
+    def probabilities(self):
+        return dict(zip(self.batch.class_names, self.batch.probabilities[self.index].tolist()))
+
+    def to_dict(self):
+        return {
+            "species": self.species,
+            "confidence": self.confidence,
+            "probabilities": self.probabilities,
+        }
+
+
+class BatchPrediction:
+    """
+    Predictions for a batch kept as contiguous arrays.
+
+    Holds the (n,) class index vector, the (n, n_classes) probability matrix
+    and the version of the model that scored them; per-row objects are only
+    created on access, and iter_json writes the HTTP response straight from
+    the arrays.
+    """
+
+    __slots__ = ("predictions", "probabilities", "class_names", "model_version")
+
+    def __init__(self, predictions, probabilities, class_names, model_version=None):
+        self.predictions = predictions
+        self.probabilities = probabilities
+        self.class_names = list(class_names)
+        self.model_version = model_version
+
+    @classmethod
+    def empty(cls, class_names, model_version=None):
+        return cls(np.empty(0, dtype=np.int64), np.empty((0, len(class_names))), class_names, model_version)
+
+    def __len__(self):
+        return len(self.predictions)
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return PredictionView(self, index % len(self))
+
+    def __iter__(self):
+        return (PredictionView(self, i) for i in range(len(self)))
+
+    @property
+    def confidence(self):
+        return self.probabilities[np.arange(len(self)), self.predictions]
+
+    @property
+    def nbytes(self):
+        return self.predictions.nbytes + self.probabilities.nbytes
+
+    def iter_json(self, key="predictions", chunk_rows=8192):
+        """
+        Yield the ``{key: [PredictionOutput, ...]}`` JSON document in chunks.
+
+        Rows are formatted chunk by chunk from the arrays, so only one chunk's
+        worth of Python objects exists at a time.
+        """
+        names = [json.dumps(name) for name in self.class_names]
+        row_template = (
+            '{"species":%s,"confidence":%r,"probabilities":{'
+            + ",".join(f"{name}:%r" for name in names)
+            + "}}"
+        )
+        yield ("{" + json.dumps(key) + ":[").encode()
+        for start in range(0, len(self), chunk_rows):
+            stop = min(start + chunk_rows, len(self))
+            predictions = self.predictions[start:stop].tolist()
+            probabilities = self.probabilities[start:stop].tolist()
+            rows = [
+                row_template % (names[p], row[p], *row)
+                for p, row in zip(predictions, probabilities)
+            ]
+            yield (("," if start else "") + ",".join(rows)).encode()
+        yield b"]}"
+
+
+class InferenceEngine:
+    """
+    Scores feature matrices with a fitted classifier.
+
+    The model and its version are held as one (model, version) pair and
+    replaced together by publish(), so a reader never pairs one model with
+    another model's version.
+    """
+
+    def __init__(self, model, class_names=CLASS_NAMES, version="unversioned"):
+        self.class_names = list(class_names)
+        self._state = (model, version)
+
+    @property
+    def model(self):
+        return self._state[0]
+
+    @property
+    def version(self):
+        return self._state[1]
+
+    def publish(self, model, version):
+        """Swap in a new model and its version with a single reference assignment"""
+        self._state = (model, version)
+
+    @classmethod
+    def load(cls, path="model.pkl"):
+        """Load a pickled model; its version is a short hash of the file contents"""
+        with open(path, "rb") as f:
+            version = hashlib.sha256(f.read()).hexdigest()[:12]
+        return cls(joblib.load(path), version=version)
+
+    def predict(self, features):
+        """Score an (n, 4) matrix into a BatchPrediction tagged with the model's version"""
+        model, version = self._state
+        probabilities = model.predict_proba(features)
+        return BatchPrediction(probabilities.argmax(axis=1), probabilities, self.class_names, version)
+
+
+def summarize(batch, confidence_threshold=0.6, bins=10, max_indices=0):
+    """
+    Aggregate scored rows into totals whose size does not depend on the row count.
+
+    Returns per-species counts, overall and per-species confidence histograms,
+    mean probabilities and (optionally) up to ``max_indices`` row indices whose
+    confidence is below ``confidence_threshold``.
+    """
+    predictions, probabilities, class_names = batch.predictions, batch.probabilities, batch.class_names
+    n_rows, n_classes = probabilities.shape
+    confidence = batch.confidence
+    bin_index = np.minimum((confidence * bins).astype(np.int64), bins - 1)
+    per_class_histogram = np.bincount(
+        predictions * bins + bin_index, minlength=n_classes * bins
+    ).reshape(n_classes, bins)
+    counts = np.bincount(predictions, minlength=n_classes)
+    low_confidence = confidence < confidence_threshold
+    n_low = int(np.count_nonzero(low_confidence))
+
+    summary = {
+        "total": int(n_rows),
+        "counts": dict(zip(class_names, counts.tolist())),
+        "mean_probabilities": dict(zip(
+            class_names,
+            (probabilities.mean(axis=0) if n_rows else np.zeros(n_classes)).tolist()
+        )),
+        "mean_confidence": float(confidence.mean()) if n_rows else None,
+        "confidence_bins": np.round(np.linspace(0.0, 1.0, bins + 1), 6).tolist(),
+        "confidence_histogram": per_class_histogram.sum(axis=0).tolist(),
+        "confidence_histogram_by_species": dict(zip(class_names, per_class_histogram.tolist())),
+        "confidence_threshold": confidence_threshold,
+        "low_confidence_count": n_low,
+        "low_confidence_indices": None,
+    }
+    if max_indices > 0:
+        summary["low_confidence_indices"] = np.flatnonzero(low_confidence)[:max_indices].tolist()
+    return summary
@@ -1,41 +1,144 @@
 """
 FastAPI application for Iris flower classification
 """
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Header, Query, Request
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field, field_validator
-import joblib
+from contextlib import asynccontextmanager
+import asyncio
 import numpy as np
-from typing import List
+from typing import List, Optional
 import os
+import threading
+import time
+
+from inference import (
+    FEATURE_NAMES, MAX_MEASUREMENT, MEASUREMENT_ERROR, MIN_MEASUREMENT, BatchPrediction,
+    InferenceEngine, summarize, synthetic_features, validate_features
+)
+from monitoring import DriftMonitor, load_reference_profile
+from profiling import ProfilingMiddleware, SamplingProfiler
+from tracing import Tracer, TracingMiddleware
+from shadow import ShadowScorer
+from explain import explain_matrix, format_explanations, format_intercepts, supports_explanations
+from warmup import Warmup, asgi_request, in_warmup
+from online import OnlineLearner
+from registry import ModelRegistry, UnknownModelError
+from concurrency import ThreadConfig
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop services that share this process with the HTTP app"""
+    grpc_server = None
+    if os.environ.get("IRIS_GRPC_PORT"):
+        # Serve gRPC from the same engine so both protocols share one model
+        from grpc_server import create_server, warm_up as grpc_warm_up
+        grpc_port = int(os.environ["IRIS_GRPC_PORT"])
+        grpc_server = create_server(engine, port=grpc_port, observer=record_predictions)
+        grpc_server.start()
+        warmup.add_step(
+            "grpc",
+            lambda: asyncio.to_thread(grpc_warm_up, f"127.0.0.1:{grpc_port}", warmup_features)
+        )
+    
+    # Warm every inference path in the background; /ready reports when done
+    warmup_task = asyncio.create_task(warmup.run())
+    yield
+    warmup_task.cancel()
+    if grpc_server is not None:
+        grpc_server.stop(grace=5)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Iris Flower Classification API",
     description="A machine learning API to classify Iris flowers based on their measurements",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# On-demand sampling profiler (idle unless IRIS_PROFILE_* is configured)
+profiler = SamplingProfiler.from_env()
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+# Per-request tracing exported as OTLP/JSON (disabled unless IRIS_TRACE_* is configured)
+tracer = Tracer.from_env()
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
 # Load the trained model at startup
 try:
-    model = joblib.load("model.pkl")
-    class_names = ["setosa", "versicolor", "virginica"]
+    engine = InferenceEngine.load("model.pkl")
+    class_names = engine.class_names
 except FileNotFoundError:
     raise RuntimeError("Model file 'model.pkl' not found. Please train the model first.")
 
+feature_names = FEATURE_NAMES
+
+# Cap BLAS/OpenMP threads per worker; optionally score batches on an executor
+thread_config = ThreadConfig.from_env(profiler=profiler)
+thread_config.apply()
+
+# Streaming drift statistics, compared against the profile exported by train_model.py
+drift_monitor = DriftMonitor(
+    feature_names,
+    class_names,
+    reference=load_reference_profile("reference_profile.json")
+)
+
+# Candidate models scored in the background on live traffic (IRIS_SHADOW_MODELS)
+shadow_scorer = ShadowScorer.from_env(class_names)
+
+def record_predictions(features, batch):
+    """Feed a scored batch to drift statistics and shadow scoring"""
+    if in_warmup.get():
+        return
+    drift_monitor.update(features, batch.predictions, batch.probabilities)
+    shadow_scorer.submit(features, batch.predictions, batch.probabilities)
+
+# Background learner applying labelled feedback to the live model (IRIS_ONLINE_LEARNING=1)
+online_learner = OnlineLearner.from_env(engine)
+
+# Named model variants served under /models/{name}/... (IRIS_MODELS_DIR)
+model_registry = ModelRegistry.from_env()
+
+# Synthetic requests pushed through every inference path before reporting ready
+warmup = Warmup.from_env()
+warmup_features = synthetic_features(warmup.batch_size)
+warmup_rows = [dict(zip(FEATURE_NAMES, row)) for row in warmup_features.tolist()]
+warmup_binary = warmup_features.astype("<f8").tobytes()
+warmup.add_step("predict", lambda: asgi_request(app, "POST", "/predict", warmup_rows[0]))
+warmup.add_step("predict_batch", lambda: asgi_request(app, "POST", "/predict/batch", warmup_rows))
+warmup.add_step("predict_binary", lambda: asgi_request(app, "POST", "/predict/binary", warmup_binary))
+warmup.add_step("predict_summary", lambda: asgi_request(app, "POST", "/predict/summary", warmup_rows))
+if supports_explanations(engine.model):
+    warmup.add_step("explain", lambda: asgi_request(app, "POST", "/explain", warmup_rows[0]))
+    warmup.add_step("explain_batch", lambda: asgi_request(app, "POST", "/explain/batch", warmup_rows))
+if shadow_scorer.enabled:
+    warmup.add_step("shadow_models", lambda: shadow_scorer.warm_up(warmup_features))
+
 # Pydantic models for request and response
 class IrisInput(BaseModel):
     """Input data model for Iris flower measurements"""
-    sepal_length: float = Field(..., description="Sepal length in cm", ge=0, le=10)
-    sepal_width: float = Field(..., description="Sepal width in cm", ge=0, le=10)
-    petal_length: float = Field(..., description="Petal length in cm", ge=0, le=10)
-    petal_width: float = Field(..., description="Petal width in cm", ge=0, le=10)
+    sepal_length: float = Field(..., description="Sepal length in cm", ge=MIN_MEASUREMENT, le=MAX_MEASUREMENT)
+    sepal_width: float = Field(..., description="Sepal width in cm", ge=MIN_MEASUREMENT, le=MAX_MEASUREMENT)
+    petal_length: float = Field(..., description="Petal length in cm", ge=MIN_MEASUREMENT, le=MAX_MEASUREMENT)
+    petal_width: float = Field(..., description="Petal width in cm", ge=MIN_MEASUREMENT, le=MAX_MEASUREMENT)
     
     @field_validator('sepal_length', 'sepal_width', 'petal_length', 'petal_width')
     @classmethod
     def validate_measurements(cls, v):
-        if v < 0 or v > 10:
-            raise ValueError('Measurements must be between 0 and 10 cm')
+        if v < MIN_MEASUREMENT or v > MAX_MEASUREMENT:
+            raise ValueError(MEASUREMENT_ERROR)
+        return v
+
+class FeedbackInput(IrisInput):
+    """Labelled measurements returned by callers for online learning"""
+    species: str = Field(..., description="True Iris species")
+    
+    @field_validator('species')
+    @classmethod
+    def validate_species(cls, v):
+        if v not in class_names:
+            raise ValueError(f"Species must be one of {class_names}")
         return v
 
 class PredictionOutput(BaseModel):
@@ -44,11 +147,47 @@ class PredictionOutput(BaseModel):
     confidence: float = Field(..., description="Confidence score (0-1)")
     probabilities: dict = Field(..., description="Probabilities for each class")
 
+class SummaryOutput(BaseModel):
+    """Aggregate-only output for large batches"""
+    total: int = Field(..., description="Number of rows scored")
+    counts: dict = Field(..., description="Predicted count for each species")
+    mean_probabilities: dict = Field(..., description="Mean probability of each species")
+    mean_confidence: Optional[float] = Field(None, description="Mean confidence of the predictions")
+    confidence_bins: List[float] = Field(..., description="Confidence histogram bin edges")
+    confidence_histogram: List[int] = Field(..., description="Row count per confidence bin")
+    confidence_histogram_by_species: dict = Field(..., description="Confidence histogram per predicted species")
+    confidence_threshold: float = Field(..., description="Threshold used for low-confidence rows")
+    low_confidence_count: int = Field(..., description="Rows with confidence below the threshold")
+    low_confidence_indices: Optional[List[int]] = Field(None, description="Indices of low-confidence rows, if requested")
+
+class ExplanationOutput(BaseModel):
+    """Output data model for per-feature prediction explanations"""
+    species: str = Field(..., description="Predicted Iris species")
+    confidence: float = Field(..., description="Confidence score (0-1)")
+    runner_up: str = Field(..., description="Second most likely species")
+    margin: float = Field(..., description="Logit margin over the runner-up species")
+    logits: dict = Field(..., description="Decision value for each class")
+    intercepts: dict = Field(..., description="Intercept term for each class")
+    contributions: dict = Field(..., description="Per-class, per-feature logit contributions")
+    margin_contributions: dict = Field(..., description="Per-feature contribution to the margin")
+
 class HealthCheck(BaseModel):
     """Health check response model"""
     status: str
     is_model_loaded: bool = Field(..., description="Whether the model is loaded")
 
+def features_from_inputs(input_list: List[IrisInput]) -> np.ndarray:
+    """Stack validated inputs into an (n, 4) feature matrix"""
+    return np.array([
+        [
+            input_data.sepal_length,
+            input_data.sepal_width,
+            input_data.petal_length,
+            input_data.petal_width
+        ]
+        for input_data in input_list
+    ])
+
 # API Endpoints
 @app.get("/", response_class=HTMLResponse, summary="Modern Iris Classification Dashboard")
 async def root():
@@ -431,6 +570,112 @@ async def root():
                 text-align: center;
             }
             
+            .bulk-card {
+                grid-column: 1 / -1;
+            }
+            
+            .bulk-input {
+                width: 100%;
+                min-height: 120px;
+                padding: 15px 20px;
+                background: rgba(255, 255, 255, 0.05);
+                border: 1px solid rgba(255, 255, 255, 0.1);
+                border-radius: 12px;
+                color: var(--text);
+                font-family: 'JetBrains Mono', monospace;
+                font-size: 0.85rem;
+                resize: vertical;
+                margin-bottom: 15px;
+            }
+            
+            .bulk-controls {
+                display: grid;
+                grid-template-columns: 2fr 1fr 1fr auto auto;
+                gap: 15px;
+                align-items: end;
+                margin-bottom: 25px;
+            }
+            
+            .bulk-controls .input-container {
+                margin-bottom: 0;
+            }
+            
+            .bulk-stats {
+                display: grid;
+                grid-template-columns: repeat(auto-fit, minmax(140px, 1fr));
+                gap: 15px;
+                margin: 20px 0;
+            }
+            
+            .bulk-stat {
+                background: rgba(255, 255, 255, 0.05);
+                border: 1px solid rgba(255, 255, 255, 0.1);
+                border-radius: 12px;
+                padding: 15px;
+                text-align: center;
+            }
+            
+            .bulk-stat-value {
+                font-size: 1.3rem;
+                font-weight: 700;
+                color: var(--accent);
+            }
+            
+            .bulk-stat-label {
+                font-size: 0.8rem;
+                color: var(--text-muted);
+                text-transform: uppercase;
+                letter-spacing: 0.5px;
+            }
+            
+            .bulk-row,
+            .bulk-table-header {
+                display: grid;
+                grid-template-columns: 1fr 1fr 1fr 1fr 1fr 1.5fr 1fr;
+                gap: 10px;
+                padding: 0 15px;
+                height: 32px;
+                line-height: 32px;
+                font-size: 0.85rem;
+                white-space: nowrap;
+            }
+            
+            .bulk-table-header {
+                color: var(--text-muted);
+                text-transform: uppercase;
+                letter-spacing: 0.5px;
+                border-bottom: 1px solid rgba(255, 255, 255, 0.1);
+            }
+            
+            .bulk-row.odd {
+                background: rgba(255, 255, 255, 0.03);
+            }
+            
+            .bulk-viewport {
+                height: 384px;
+                overflow-y: auto;
+                position: relative;
+            }
+            
+            .bulk-spacer {
+                position: relative;
+            }
+            
+            .bulk-rows {
+                position: absolute;
+                top: 0;
+                left: 0;
+                right: 0;
+            }
+            
+            .bulk-pending {
+                color: var(--text-muted);
+            }
+            
+            .bulk-failed {
+                color: var(--danger);
+            }
+            
             @media (max-width: 768px) {
                 .dashboard {
                     grid-template-columns: 1fr;
@@ -440,6 +685,10 @@ async def root():
                     grid-template-columns: 1fr;
                 }
                 
+                .bulk-controls {
+                    grid-template-columns: 1fr;
+                }
+                
                 .header h1 {
                     font-size: 2.5rem;
                 }
@@ -565,9 +814,126 @@ async def root():
                         <p id="errorMessage">An error occurred during classification.</p>
                     </div>
                 </div>
+                
+                <div class="card bulk-card">
+                    <div class="card-header">
+                        <i class="fas fa-table"></i>
+                        <h3>Bulk Classification</h3>
+                    </div>
+                    
+                    <p style="color: var(--text-muted); margin-bottom: 20px;">
+                        Paste CSV rows or upload a file. A header row with sepal_length, sepal_width, petal_length and petal_width columns is optional; otherwise the first four columns are used.
+                    </p>
+                    
+                    <textarea class="bulk-input" id="bulkText" placeholder="sepal_length,sepal_width,petal_length,petal_width&#10;5.1,3.5,1.4,0.2&#10;6.3,3.3,6.0,2.5"></textarea>
+                    
+                    <div class="bulk-controls">
+                        <div class="input-container">
+                            <label for="bulkFile"><i class="fas fa-file-csv"></i> CSV File</label>
+                            <input type="file" id="bulkFile" accept=".csv,.txt,text/csv">
+                        </div>
+                        <div class="input-container">
+                            <label for="bulkChunkSize"><i class="fas fa-layer-group"></i> Rows / Request</label>
+                            <input type="number" id="bulkChunkSize" value="1000" min="1" max="100000">
+                        </div>
+                        <div class="input-container">
+                            <label for="bulkConcurrency"><i class="fas fa-stream"></i> Parallel Requests</label>
+                            <input type="number" id="bulkConcurrency" value="4" min="1" max="16">
+                        </div>
+                        <button class="btn" id="bulkStartBtn" onclick="startBulk()">
+                            <i class="fas fa-play"></i> Classify
+                        </button>
+                        <button class="quick-btn" id="bulkCancelBtn" onclick="cancelBulk()" disabled>
+                            <i class="fas fa-stop"></i> Cancel
+                        </button>
+                    </div>
+                    
+                    <div class="confidence-bar">
+                        <div class="confidence-fill" id="bulkProgress" style="width: 0%; transition: width 0.2s ease;"></div>
+                    </div>
+                    
+                    <div class="bulk-stats">
+                        <div class="bulk-stat"><div class="bulk-stat-value" id="bulkRowsDone">0</div><div class="bulk-stat-label">Rows Scored</div></div>
+                        <div class="bulk-stat"><div class="bulk-stat-value" id="bulkProgressText">0%</div><div class="bulk-stat-label">Progress</div></div>
+                        <div class="bulk-stat"><div class="bulk-stat-value" id="bulkThroughput">0</div><div class="bulk-stat-label">Rows / Second</div></div>
+                        <div class="bulk-stat"><div class="bulk-stat-value" id="bulkElapsed">0.0s</div><div class="bulk-stat-label">Elapsed</div></div>
+                        <div class="bulk-stat"><div class="bulk-stat-value" id="bulkSkipped">0</div><div class="bulk-stat-label">Invalid Lines</div></div>
+                        <div class="bulk-stat"><div class="bulk-stat-value" id="bulkFailed">0</div><div class="bulk-stat-label">Failed Rows</div></div>
+                        <div class="bulk-stat"><div class="bulk-stat-value" id="bulkSpecies">-</div><div class="bulk-stat-label">🌸 / 🌼 / 🌺</div></div>
+                    </div>
+                    
+                    <div id="bulkError" class="error" style="display: none; margin-bottom: 20px;"></div>
+                    
+                    <div class="bulk-table-header">
+                        <span>#</span><span>Sepal L</span><span>Sepal W</span><span>Petal L</span><span>Petal W</span><span>Species</span><span>Confidence</span>
+                    </div>
+                    <div class="bulk-viewport" id="bulkViewport">
+                        <div class="bulk-spacer" id="bulkSpacer">
+                            <div class="bulk-rows" id="bulkRows"></div>
+                        </div>
+                    </div>
+                </div>
             </div>
         </div>
         
+        <!-- CSV parsing runs in a Web Worker (started from a Blob URL) so large files never block the page -->
+        <script id="bulkWorkerSource" type="javascript/worker">
+            const FEATURES = ['sepal_length', 'sepal_width', 'petal_length', 'petal_width'];
+            
+            self.onmessage = async function(e) {
+                const { file, text, chunkSize } = e.data;
+                const source = file ? await file.text() : text;
+                const lines = source.split(/\\r?\\n/);
+                
+                // Use named columns when there is a header row, else the first four columns
+                let columns = [0, 1, 2, 3];
+                let first = 0;
+                const head = lines[0].split(',').map(cell => cell.trim().replace(/^"|"$/g, '').toLowerCase());
+                if (head.some(cell => cell !== '' && isNaN(Number(cell)))) {
+                    first = 1;
+                    if (FEATURES.every(name => head.includes(name))) {
+                        columns = FEATURES.map(name => head.indexOf(name));
+                    }
+                }
+                self.postMessage({ type: 'start', lines: lines.length - first });
+                
+                let features = new Float64Array(chunkSize * 4);
+                let parts = [];
+                let count = 0;
+                let start = 0;
+                let skipped = 0;
+                
+                // Each chunk carries its feature matrix and a ready-to-send JSON body
+                const flush = () => {
+                    const chunk = features.slice(0, count * 4);
+                    self.postMessage(
+                        { type: 'chunk', start, count, features: chunk, body: '[' + parts.join(',') + ']' },
+                        [chunk.buffer]
+                    );
+                    start += count;
+                    count = 0;
+                    parts = [];
+                };
+                
+                for (let i = first; i < lines.length; i++) {
+                    const line = lines[i].trim();
+                    if (!line) continue;
+                    const cells = line.split(',');
+                    const values = columns.map(c => cells[c] === undefined || cells[c].trim() === '' ? NaN : Number(cells[c]));
+                    if (values.some(v => !Number.isFinite(v) || v < 0 || v > 10)) {
+                        skipped++;
+                        continue;
+                    }
+                    features.set(values, count * 4);
+                    parts.push('{' + FEATURES.map((name, j) => '"' + name + '":' + values[j]).join(',') + '}');
+                    count++;
+                    if (count === chunkSize) flush();
+                }
+                if (count) flush();
+                self.postMessage({ type: 'done', total: start, skipped });
+            };
+        </script>
+        
         <script>
             const speciesData = {
                 'setosa': { icon: '🌸', color: '#ff6b6b' },
@@ -694,6 +1060,210 @@ async def root():
                 document.getElementById('errorMessage').textContent = message;
                 document.getElementById('errorDisplay').style.display = 'block';
             }
+            
+            // Bulk mode: the worker parses CSV into chunks, which are posted to
+            // /predict/batch with at most `concurrency` requests in flight
+            const BULK_ROW_HEIGHT = 32;
+            const bulkClasses = Object.keys(speciesData);
+            const bulkWorkerUrl = URL.createObjectURL(new Blob(
+                [document.getElementById('bulkWorkerSource').textContent],
+                { type: 'text/javascript' }
+            ));
+            let bulk = null;
+            
+            function startBulk() {
+                const file = document.getElementById('bulkFile').files[0];
+                const text = document.getElementById('bulkText').value;
+                if (!file && !text.trim()) {
+                    showBulkError('Paste CSV rows or choose a file first.');
+                    return;
+                }
+                if (bulk) cancelBulk();
+                
+                bulk = {
+                    worker: new Worker(bulkWorkerUrl),
+                    controller: new AbortController(),
+                    chunkSize: Math.max(1, parseInt(document.getElementById('bulkChunkSize').value) || 1000),
+                    concurrency: Math.max(1, parseInt(document.getElementById('bulkConcurrency').value) || 4),
+                    chunks: [],
+                    queue: [],
+                    inFlight: 0,
+                    parsing: true,
+                    expected: 0,
+                    parsed: 0,
+                    scored: 0,
+                    failed: 0,
+                    skipped: 0,
+                    counts: new Array(bulkClasses.length).fill(0),
+                    startedAt: performance.now(),
+                    finishedAt: null,
+                    renderPending: false
+                };
+                document.getElementById('bulkError').style.display = 'none';
+                document.getElementById('bulkStartBtn').disabled = true;
+                document.getElementById('bulkCancelBtn').disabled = false;
+                document.getElementById('bulkViewport').scrollTop = 0;
+                
+                const run = bulk;
+                run.worker.onmessage = function(e) {
+                    if (bulk !== run) return;
+                    const message = e.data;
+                    if (message.type === 'start') {
+                        run.expected = message.lines;
+                    } else if (message.type === 'chunk') {
+                        const chunk = {
+                            start: message.start,
+                            count: message.count,
+                            features: message.features,
+                            body: message.body,
+                            species: new Int8Array(message.count).fill(-1),
+                            confidence: new Float32Array(message.count),
+                            failed: false
+                        };
+                        run.chunks.push(chunk);
+                        run.queue.push(chunk);
+                        run.parsed += chunk.count;
+                        pumpBulk();
+                    } else if (message.type === 'done') {
+                        run.parsing = false;
+                        run.expected = message.total;
+                        run.skipped = message.skipped;
+                        run.worker.terminate();
+                        pumpBulk();
+                    }
+                    scheduleBulkRender();
+                };
+                run.worker.onerror = function(e) {
+                    showBulkError('Could not parse CSV: ' + e.message);
+                    cancelBulk();
+                };
+                run.worker.postMessage({ file, text, chunkSize: run.chunkSize });
+            }
+            
+            function pumpBulk() {
+                const run = bulk;
+                while (run.inFlight < run.concurrency && run.queue.length) {
+                    sendBulkChunk(run, run.queue.shift());
+                }
+                if (!run.parsing && !run.queue.length && !run.inFlight && run.finishedAt === null) {
+                    run.finishedAt = performance.now();
+                    document.getElementById('bulkStartBtn').disabled = false;
+                    document.getElementById('bulkCancelBtn').disabled = true;
+                }
+            }
+            
+            async function sendBulkChunk(run, chunk) {
+                run.inFlight++;
+                try {
+                    const response = await fetch('/predict/batch', {
+                        method: 'POST',
+                        headers: { 'Content-Type': 'application/json' },
+                        body: chunk.body,
+                        signal: run.controller.signal
+                    });
+                    const data = await response.json();
+                    if (!response.ok) {
+                        throw new Error(typeof data.detail === 'string' ? data.detail : 'HTTP ' + response.status);
+                    }
+                    data.predictions.forEach((prediction, i) => {
+                        const index = bulkClasses.indexOf(prediction.species);
+                        chunk.species[i] = index;
+                        chunk.confidence[i] = prediction.confidence;
+                        run.counts[index]++;
+                    });
+                    run.scored += chunk.count;
+                } catch (error) {
+                    if (error.name === 'AbortError') return;
+                    chunk.failed = true;
+                    run.failed += chunk.count;
+                    showBulkError('Rows ' + (chunk.start + 1) + '-' + (chunk.start + chunk.count) + ' failed: ' + error.message);
+                } finally {
+                    chunk.body = null;
+                    run.inFlight--;
+                    if (bulk === run) {
+                        pumpBulk();
+                        scheduleBulkRender();
+                    }
+                }
+            }
+            
+            function cancelBulk() {
+                if (!bulk) return;
+                bulk.worker.terminate();
+                bulk.controller.abort();
+                bulk.parsing = false;
+                bulk.queue = [];
+                bulk.finishedAt = bulk.finishedAt || performance.now();
+                document.getElementById('bulkStartBtn').disabled = false;
+                document.getElementById('bulkCancelBtn').disabled = true;
+                scheduleBulkRender();
+            }
+            
+            function showBulkError(message) {
+                const box = document.getElementById('bulkError');
+                box.textContent = message;
+                box.style.display = 'block';
+            }
+            
+            function scheduleBulkRender() {
+                if (!bulk || bulk.renderPending) return;
+                bulk.renderPending = true;
+                requestAnimationFrame(() => {
+                    bulk.renderPending = false;
+                    renderBulkStats();
+                    renderBulkRows();
+                });
+            }
+            
+            function renderBulkStats() {
+                const run = bulk;
+                const seconds = ((run.finishedAt || performance.now()) - run.startedAt) / 1000;
+                const done = run.scored + run.failed;
+                const total = run.parsing ? Math.max(run.expected, run.parsed) : run.parsed;
+                const percent = total ? Math.min(100, done / total * 100) : (run.parsing ? 0 : 100);
+                document.getElementById('bulkProgress').style.width = percent.toFixed(1) + '%';
+                document.getElementById('bulkProgressText').textContent = percent.toFixed(1) + '%';
+                document.getElementById('bulkRowsDone').textContent = run.scored.toLocaleString();
+                document.getElementById('bulkThroughput').textContent = seconds > 0 ? Math.round(run.scored / seconds).toLocaleString() : '0';
+                document.getElementById('bulkElapsed').textContent = seconds.toFixed(1) + 's';
+                document.getElementById('bulkSkipped').textContent = run.skipped.toLocaleString();
+                document.getElementById('bulkFailed').textContent = run.failed.toLocaleString();
+                document.getElementById('bulkSpecies').textContent = run.counts.map(c => c.toLocaleString()).join(' / ');
+            }
+            
+            // Only the rows inside the scrolled viewport (plus a small margin) exist in the DOM
+            function renderBulkRows() {
+                const run = bulk;
+                const viewport = document.getElementById('bulkViewport');
+                document.getElementById('bulkSpacer').style.height = (run.parsed * BULK_ROW_HEIGHT) + 'px';
+                const first = Math.max(0, Math.floor(viewport.scrollTop / BULK_ROW_HEIGHT) - 5);
+                const last = Math.min(run.parsed, first + Math.ceil(viewport.clientHeight / BULK_ROW_HEIGHT) + 10);
+                const html = [];
+                for (let row = first; row < last; row++) {
+                    const chunk = run.chunks[Math.floor(row / run.chunkSize)];
+                    const i = row - chunk.start;
+                    const f = chunk.features;
+                    let species = '<span class="bulk-pending">pending</span>';
+                    let confidence = '<span class="bulk-pending">-</span>';
+                    if (chunk.failed) {
+                        species = '<span class="bulk-failed">failed</span>';
+                    } else if (chunk.species[i] >= 0) {
+                        const name = bulkClasses[chunk.species[i]];
+                        species = '<span style="color: ' + speciesData[name].color + '">' + speciesData[name].icon + ' ' + name + '</span>';
+                        confidence = (chunk.confidence[i] * 100).toFixed(1) + '%';
+                    }
+                    html.push(
+                        '<div class="bulk-row' + (row % 2 ? ' odd' : '') + '"><span>' + (row + 1) + '</span><span>' + f[i * 4] + '</span><span>' + f[i * 4 + 1] +
+                        '</span><span>' + f[i * 4 + 2] + '</span><span>' + f[i * 4 + 3] + '</span><span>' + species +
+                        '</span><span>' + confidence + '</span></div>'
+                    );
+                }
+                const rows = document.getElementById('bulkRows');
+                rows.style.transform = 'translateY(' + (first * BULK_ROW_HEIGHT) + 'px)';
+                rows.innerHTML = html.join('');
+            }
+            
+            document.getElementById('bulkViewport').addEventListener('scroll', scheduleBulkRender);
         </script>
     </body>
     </html>
@@ -705,10 +1275,22 @@ async def health_check():
     """Check if the API and model are working properly"""
     return HealthCheck(
         status="healthy",
-        is_model_loaded=model is not None
+        is_model_loaded=engine.model is not None
     )
 
+@app.get("/ready", summary="Readiness probe")
+async def readiness_check():
+    """
+    Report whether start-up warm-up has finished.
+    
+    Returns 200 once synthetic requests have been run through every inference
+    path, and 503 while warming up (or if warm-up failed). The body includes
+    the measured warm-up latencies.
+    """
+    return JSONResponse(warmup.status(), status_code=200 if warmup.ready else 503)
+
 @app.post("/predict", response_model=PredictionOutput, summary="Predict Iris species")
+@tracer.handler
 async def predict_iris(input_data: IrisInput):
     """
     Predict the Iris flower species based on sepal and petal measurements.
@@ -730,23 +1312,19 @@ async def predict_iris(input_data: IrisInput):
         ]])
         
         # Make prediction
-        prediction = model.predict(features)[0]
-        probabilities = model.predict_proba(features)[0]
+        with tracer.span("inference", batch_size=1) as span:
+            batch = engine.predict(features)
+            span.set_attribute("model_version", batch.model_version)
         
-        # Prepare response
-        predicted_species = class_names[prediction]
-        confidence = float(probabilities[prediction])
-        
-        # Create probabilities dictionary
-        prob_dict = {
-            class_names[i]: float(probabilities[i]) 
-            for i in range(len(class_names))
-        }
+        # Record distributions and hand the input to shadow models
+        record_predictions(features, batch)
         
+        # Prepare response
+        result = batch[0]
         return PredictionOutput(
-            species=predicted_species,
-            confidence=confidence,
-            probabilities=prob_dict
+            species=result.species,
+            confidence=result.confidence,
+            probabilities=result.probabilities
         )
     
     except Exception as e:
@@ -756,6 +1334,7 @@ async def predict_iris(input_data: IrisInput):
         )
 
 @app.post("/predict/batch", summary="Batch prediction")
+@tracer.handler
 async def predict_batch(input_list: List[IrisInput]):
     """
     Predict multiple Iris flowers at once.
@@ -763,37 +1342,241 @@ async def predict_batch(input_list: List[IrisInput]):
     Takes a list of flower measurements and returns predictions for each.
     """
     try:
-        predictions = []
+        if not input_list:
+            return {"predictions": []}
+        
+        # Prepare the feature matrix for the whole batch
+        features = features_from_inputs(input_list)
+        
+        # Score every row in one call
+        with tracer.span("inference", batch_size=len(features)) as span:
+            batch = await thread_config.run(engine.predict, features)
+            span.set_attribute("model_version", batch.model_version)
+        
+        # Record distributions and hand the batch to shadow models
+        record_predictions(features, batch)
+        
+        # Serialize straight from the result arrays, one chunk of rows at a time
+        return StreamingResponse(batch.iter_json(), media_type="application/json")
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Batch prediction error: {str(e)}"
+        )
+
+@app.post(
+    "/predict/binary",
+    summary="Binary batch prediction",
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}}
+    }}
+)
+@tracer.handler
+async def predict_binary(request: Request):
+    """
+    Predict a batch sent as packed binary rows.
+    
+    The request body is little-endian float64 measurements, row-major, four
+    per row (sepal_length, sepal_width, petal_length, petal_width). The
+    response is the little-endian float64 probability matrix, one row per
+    input, with the column order given by the `X-Iris-Classes` header.
+    """
+    body = await request.body()
+    row_bytes = 8 * len(FEATURE_NAMES)
+    if len(body) % row_bytes:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Body must be a whole number of {row_bytes}-byte rows"
+        )
+    features = np.frombuffer(body, dtype="<f8").reshape(-1, len(FEATURE_NAMES))
+    try:
+        validate_features(features)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    try:
+        headers = {"X-Iris-Classes": ",".join(class_names)}
+        if not len(features):
+            return Response(b"", media_type="application/octet-stream", headers=headers)
+        
+        with tracer.span("inference", batch_size=len(features)) as span:
+            batch = await thread_config.run(engine.predict, features)
+            span.set_attribute("model_version", batch.model_version)
+        record_predictions(features, batch)
+        
+        probabilities = np.ascontiguousarray(batch.probabilities, dtype="<f8")
+        return Response(probabilities.tobytes(), media_type="application/octet-stream", headers=headers)
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Binary prediction error: {str(e)}"
+        )
+
+@app.post("/predict/summary", response_model=SummaryOutput, summary="Aggregate batch prediction")
+async def predict_summary(
+    input_list: List[IrisInput],
+    confidence_threshold: float = Query(0.6, ge=0, le=1, description="Rows below this confidence count as low-confidence"),
+    bins: int = Query(10, ge=1, le=100, description="Number of confidence histogram bins"),
+    max_indices: int = Query(0, ge=0, le=100000, description="Return up to this many low-confidence row indices")
+):
+    """
+    Score a batch and return only aggregates.
+    
+    Returns per-species counts, confidence histograms and mean probabilities
+    instead of one prediction per row, so the response size does not grow
+    with the number of rows.
+    """
+    try:
+        if input_list:
+            features = features_from_inputs(input_list)
+            batch = await thread_config.run(engine.predict, features)
+            record_predictions(features, batch)
+        else:
+            batch = BatchPrediction.empty(class_names)
+        
+        return summarize(
+            batch,
+            confidence_threshold=confidence_threshold,
+            bins=bins,
+            max_indices=max_indices
+        )
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Summary prediction error: {str(e)}"
+        )
+
+def require_explanations(model):
+    """Reject explanation requests when the served model is not linear"""
+    if not supports_explanations(model):
+        raise HTTPException(
+            status_code=400,
+            detail="Explanations are not supported for this model (requires a multi-class linear model with coef_)"
+        )
+
+@app.post("/explain", response_model=ExplanationOutput, summary="Explain a prediction")
+async def explain_iris(input_data: IrisInput):
+    """
+    Explain the prediction for a single flower.
+    
+    Returns the per-class, per-feature logit contributions (input times
+    coefficient), the intercepts, and the margin to the runner-up species.
+    """
+    model = engine.model
+    require_explanations(model)
+    try:
+        result = explain_matrix(model, features_from_inputs([input_data]))
+        return format_explanations(result, model.intercept_, class_names, feature_names)[0]
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Explanation error: {str(e)}"
+        )
+
+@app.post("/explain/batch", summary="Batch explanation")
+async def explain_batch(input_list: List[IrisInput]):
+    """
+    Explain multiple predictions at once.
+    
+    Contributions for the whole batch are computed with a single vectorized
+    pass over the feature matrix. The intercepts are the same for every row,
+    so they are returned once next to the explanations.
+    """
+    model = engine.model
+    require_explanations(model)
+    try:
+        intercepts = format_intercepts(model.intercept_, class_names)
+        if not input_list:
+            return {"intercepts": intercepts, "explanations": []}
+        
+        result = explain_matrix(model, features_from_inputs(input_list))
         
-        for input_data in input_list:
-            # Prepare features
-            features = np.array([[
-                input_data.sepal_length,
-                input_data.sepal_width,
-                input_data.petal_length,
-                input_data.petal_width
-            ]])
-            
-            # Make prediction
-            prediction = model.predict(features)[0]
-            probabilities = model.predict_proba(features)[0]
-            
-            # Prepare response
-            predicted_species = class_names[prediction]
-            confidence = float(probabilities[prediction])
-            
-            prob_dict = {
-                class_names[i]: float(probabilities[i]) 
-                for i in range(len(class_names))
-            }
-            
-            predictions.append(PredictionOutput(
-                species=predicted_species,
-                confidence=confidence,
-                probabilities=prob_dict
-            ))
+        # The rows are plain floats and strings already, so skip jsonable_encoder
+        return JSONResponse({
+            "intercepts": intercepts,
+            "explanations": format_explanations(
+                result, model.intercept_, class_names, feature_names, include_intercepts=False
+            )
+        })
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Batch explanation error: {str(e)}"
+        )
+
+async def named_engine(name: str) -> InferenceEngine:
+    """Fetch a named model from the registry, loading it on first use"""
+    try:
+        return await model_registry.get(name)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model load error: {str(e)}")
+
+@app.get("/models", summary="Named model registry status")
+async def list_models():
+    """
+    List the models available in the models directory and the ones loaded.
+    
+    Includes cache usage and per-model load, eviction and latency statistics.
+    """
+    return model_registry.status()
+
+@app.post("/models/{name}/predict", response_model=PredictionOutput, summary="Predict with a named model")
+@tracer.handler
+async def predict_named(name: str, input_data: IrisInput):
+    """
+    Predict the Iris species with the model stored as `<name>.pkl`.
+    
+    The model is loaded on first use and kept in a memory-bounded LRU cache.
+    """
+    model_engine = await named_engine(name)
+    try:
+        features = features_from_inputs([input_data])
+        start = time.perf_counter()
+        with tracer.span("inference", batch_size=1, model_name=name) as span:
+            batch = model_engine.predict(features)
+            span.set_attribute("model_version", batch.model_version)
+        result = batch[0]
+        model_registry.record(name, 1, time.perf_counter() - start)
+        return PredictionOutput(
+            species=result.species,
+            confidence=result.confidence,
+            probabilities=result.probabilities
+        )
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, 
+            detail=f"Prediction error: {str(e)}"
+        )
+
+@app.post("/models/{name}/predict/batch", summary="Batch prediction with a named model")
+@tracer.handler
+async def predict_named_batch(name: str, input_list: List[IrisInput]):
+    """
+    Predict multiple flowers with the model stored as `<name>.pkl`.
+    
+    Same response format as /predict/batch.
+    """
+    model_engine = await named_engine(name)
+    try:
+        if not input_list:
+            return {"predictions": []}
         
-        return {"predictions": predictions}
+        features = features_from_inputs(input_list)
+        start = time.perf_counter()
+        with tracer.span("inference", batch_size=len(features), model_name=name) as span:
+            batch = await thread_config.run(model_engine.predict, features)
+            span.set_attribute("model_version", batch.model_version)
+        model_registry.record(name, len(features), time.perf_counter() - start)
+        return StreamingResponse(batch.iter_json(), media_type="application/json")
     
     except Exception as e:
         raise HTTPException(
@@ -801,6 +1584,112 @@ async def predict_batch(input_list: List[IrisInput]):
             detail=f"Batch prediction error: {str(e)}"
         )
 
+@app.post("/feedback", summary="Submit labelled measurements")
+async def submit_feedback(feedback_list: List[FeedbackInput]):
+    """
+    Queue labelled measurements for online learning.
+    
+    Rows are buffered and applied to the live model in mini-batches by a
+    background learner; new weights are published without blocking inference.
+    """
+    if not online_learner.enabled:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Online learning is disabled: {online_learner.disabled_reason}"
+        )
+    
+    features = features_from_inputs(feedback_list)
+    labels = [class_names.index(feedback.species) for feedback in feedback_list]
+    accepted = online_learner.submit(features, labels)
+    return {"accepted": accepted, "buffered_rows": online_learner.status()["buffered_rows"]}
+
+@app.get("/feedback/stats", summary="Online learning statistics")
+async def get_feedback_stats():
+    """Update throughput, model swap frequency and rolling (predict-then-learn) accuracy"""
+    return online_learner.status()
+
+@app.get("/stats", summary="Input drift and prediction statistics")
+async def get_stats():
+    """
+    Streaming statistics over all inputs scored so far.
+    
+    Reports per-feature mean, variance, quantiles and histograms, per-class
+    counts and confidence distributions, and PSI drift scores against the
+    reference profile exported by train_model.py.
+    """
+    return drift_monitor.snapshot()
+
+@app.get("/tracing", summary="Tracing exporter statistics")
+async def get_tracing_stats():
+    """Report the sampling rate and how many spans were exported, dropped or failed"""
+    return tracer.status()
+
+@app.get("/threads", summary="Native thread pool configuration")
+async def get_thread_config():
+    """Report the BLAS/OpenMP thread limits and inference executor size of this worker"""
+    return thread_config.status()
+
+@app.get("/shadow", summary="Shadow model comparison")
+async def get_shadow_stats():
+    """
+    Comparison of candidate models against the live model on real traffic.
+    
+    Reports agreement rate, per-class probability deltas, candidate latency
+    and shadow queue drops for every model listed in IRIS_SHADOW_MODELS.
+    """
+    return shadow_scorer.snapshot()
+
+def require_profile_token(token: Optional[str]):
+    """Reject admin profiling calls without the configured token"""
+    if not profiler.check_token(token):
+        raise HTTPException(status_code=403, detail="Invalid or missing profiling token")
+
+@app.get("/admin/profile", summary="Profiler status")
+async def profile_status(x_profile_token: Optional[str] = Header(None)):
+    """Current profiler configuration and sample counts"""
+    require_profile_token(x_profile_token)
+    return profiler.status()
+
+@app.post("/admin/profile/start", summary="Start a profiling window")
+async def profile_start(
+    seconds: float = Query(30.0, gt=0, le=3600, description="Window length in seconds"),
+    x_profile_token: Optional[str] = Header(None)
+):
+    """Continuously sample the serving event loop for the given number of seconds"""
+    require_profile_token(x_profile_token)
+    profiler.start_window(seconds, threading.get_ident())
+    return profiler.status()
+
+@app.post("/admin/profile/stop", summary="Stop the profiling window")
+async def profile_stop(x_profile_token: Optional[str] = Header(None)):
+    """End the current profiling window early"""
+    require_profile_token(x_profile_token)
+    profiler.stop_window()
+    return profiler.status()
+
+@app.get("/admin/profile/export", summary="Export aggregated profile")
+async def profile_export(
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+    x_profile_token: Optional[str] = Header(None)
+):
+    """
+    Export aggregated stacks for flamegraph tooling.
+    
+    - **collapsed**: folded stacks for flamegraph.pl / speedscope import
+    - **speedscope**: native speedscope JSON document
+    """
+    require_profile_token(x_profile_token)
+    if format == "speedscope":
+        return profiler.export_speedscope()
+    return PlainTextResponse(profiler.export_collapsed())
+
+@app.delete("/admin/profile", summary="Discard aggregated profile")
+async def profile_reset(x_profile_token: Optional[str] = Header(None)):
+    """Clear all collected samples"""
+    require_profile_token(x_profile_token)
+    profiler.reset()
+    return profiler.status()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
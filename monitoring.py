@@ -0,0 +1,305 @@
+"""
+Streaming input-drift and prediction-distribution statistics.
+
+Every accumulator here has a fixed memory footprint that does not grow with
+traffic, and every update takes a whole feature matrix so that a batch of N
+rows costs a handful of NumPy calls rather than N Python iterations.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+# Default histogram cut points used when no reference profile is available.
+# Measurements are validated to lie in [0, 10] cm.
+DEFAULT_CUTS = np.linspace(0.0, 10.0, 21)[1:-1]
+CONFIDENCE_BINS = 10
+SUMMARY_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class RunningMoments:
+    """Per-feature count, mean and variance using Welford/Chan batch merging"""
+
+    def __init__(self, n_features):
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.minimum = np.full(n_features, np.inf)
+        self.maximum = np.full(n_features, -np.inf)
+
+    def update(self, X):
+        n_b = X.shape[0]
+        if n_b == 0:
+            return
+        mean_b = X.mean(axis=0)
+        m2_b = ((X - mean_b) ** 2).sum(axis=0)
+        total = self.count + n_b
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * (n_b / total)
+        self.m2 = self.m2 + m2_b + delta ** 2 * (self.count * n_b / total)
+        self.count = total
+        np.minimum(self.minimum, X.min(axis=0), out=self.minimum)
+        np.maximum(self.maximum, X.max(axis=0), out=self.maximum)
+
+    @property
+    def variance(self):
+        if self.count < 2:
+            return np.zeros_like(self.mean)
+        return self.m2 / (self.count - 1)
+
+
+class FixedHistogram:
+    """Counts of values falling between fixed cut points (open-ended outer bins)"""
+
+    def __init__(self, cuts):
+        self.cuts = np.asarray(cuts, dtype=float)
+        self.counts = np.zeros(len(self.cuts) + 1, dtype=np.int64)
+
+    def update(self, values):
+        if values.size == 0:
+            return
+        idx = np.searchsorted(self.cuts, values, side="right")
+        self.counts += np.bincount(idx, minlength=len(self.counts))
+
+    def proportions(self):
+        total = self.counts.sum()
+        if total == 0:
+            return np.zeros(len(self.counts))
+        return self.counts / total
+
+
+class QuantileSketch:
+    """
+    Fixed-size weighted-centroid quantile sketch.
+
+    Incoming values are merged with the current centroids and the result is
+    compressed back to at most ``size`` equal-weight centroids, so memory stays
+    constant and each update is a sort plus a few bincounts.
+    """
+
+    def __init__(self, size=128):
+        self.size = size
+        self.values = np.empty(0)
+        self.weights = np.empty(0)
+
+    def update(self, values):
+        if values.size == 0:
+            return
+        merged_values = np.concatenate([self.values, values.astype(float)])
+        merged_weights = np.concatenate([self.weights, np.ones(values.size)])
+        if merged_values.size <= self.size:
+            order = np.argsort(merged_values, kind="stable")
+            self.values = merged_values[order]
+            self.weights = merged_weights[order]
+            return
+
+        order = np.argsort(merged_values, kind="stable")
+        merged_values = merged_values[order]
+        merged_weights = merged_weights[order]
+        total = merged_weights.sum()
+        cumulative = np.cumsum(merged_weights) - merged_weights
+        groups = np.minimum((cumulative / total * self.size).astype(np.int64), self.size - 1)
+        weights = np.bincount(groups, weights=merged_weights, minlength=self.size)
+        sums = np.bincount(groups, weights=merged_values * merged_weights, minlength=self.size)
+        keep = weights > 0
+        self.weights = weights[keep]
+        self.values = sums[keep] / self.weights
+
+    def quantile(self, q):
+        if self.values.size == 0:
+            return None
+        total = self.weights.sum()
+        midpoints = (np.cumsum(self.weights) - self.weights / 2) / total
+        return float(np.interp(q, midpoints, self.values))
+
+
+def population_stability_index(expected, actual, eps=1e-4):
+    """PSI between two binned distributions given as proportions"""
+    expected = np.clip(np.asarray(expected, dtype=float), eps, None)
+    actual = np.clip(np.asarray(actual, dtype=float), eps, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def build_reference_profile(X, y, probabilities, feature_names, class_names, n_bins=10):
+    """Summarise a training matrix into the profile that live traffic is compared to"""
+    moments = RunningMoments(len(feature_names))
+    moments.update(X)
+    histograms = []
+    for j in range(len(feature_names)):
+        column = X[:, j]
+        histogram = FixedHistogram(
+            np.unique(np.quantile(column, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        )
+        histogram.update(column)
+        histograms.append(histogram)
+
+    confidence = probabilities.max(axis=1)
+    confidence_counts = np.bincount(
+        np.minimum((confidence * CONFIDENCE_BINS).astype(np.int64), CONFIDENCE_BINS - 1),
+        minlength=CONFIDENCE_BINS,
+    )
+    return reference_profile_from_counts(
+        feature_names,
+        class_names,
+        moments,
+        histograms,
+        np.bincount(y, minlength=len(class_names)),
+        confidence_counts,
+    )
+
+
+def reference_profile_from_counts(feature_names, class_names, moments, histograms,
+                                  class_counts, confidence_counts):
+    """
+    Assemble a reference profile from already-accumulated statistics.
+
+    Used directly by streaming training, where the data never fits in memory.
+    """
+    std = np.sqrt(moments.variance)
+    features = {
+        name: {
+            "mean": float(moments.mean[j]),
+            "std": float(std[j]),
+            "cuts": histograms[j].cuts.tolist(),
+            "proportions": histograms[j].proportions().tolist(),
+        }
+        for j, name in enumerate(feature_names)
+    }
+    return {
+        "n_samples": int(moments.count),
+        "features": features,
+        "class_proportions": {
+            name: float(class_counts[i] / class_counts.sum())
+            for i, name in enumerate(class_names)
+        },
+        "confidence_proportions": (confidence_counts / confidence_counts.sum()).tolist(),
+    }
+
+
+def load_reference_profile(path):
+    """Load a reference profile written by train_model.py, or None if absent"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+class DriftMonitor:
+    """Thread-safe, constant-memory statistics over served requests"""
+
+    def __init__(self, feature_names, class_names, reference=None, sketch_size=128):
+        self.feature_names = list(feature_names)
+        self.class_names = list(class_names)
+        self.reference = reference
+        self._lock = threading.Lock()
+
+        n_features = len(self.feature_names)
+        self.moments = RunningMoments(n_features)
+        self.histograms = []
+        for name in self.feature_names:
+            cuts = DEFAULT_CUTS
+            if reference is not None and name in reference.get("features", {}):
+                cuts = reference["features"][name]["cuts"]
+            self.histograms.append(FixedHistogram(cuts))
+        self.sketches = [QuantileSketch(sketch_size) for _ in self.feature_names]
+
+        n_classes = len(self.class_names)
+        self.class_counts = np.zeros(n_classes, dtype=np.int64)
+        self.confidence_counts = np.zeros((n_classes, CONFIDENCE_BINS), dtype=np.int64)
+        self.confidence_sums = np.zeros(n_classes)
+
+    def update(self, X, predictions, probabilities):
+        """
+        Fold one scored batch into the statistics.
+
+        ``X`` is the (n, n_features) input matrix, ``predictions`` the class
+        index per row and ``probabilities`` the (n, n_classes) output matrix.
+        """
+        if X.shape[0] == 0:
+            return
+        n_classes = len(self.class_names)
+        confidence = probabilities[np.arange(len(predictions)), predictions]
+        confidence_bins = np.minimum(
+            (confidence * CONFIDENCE_BINS).astype(np.int64), CONFIDENCE_BINS - 1
+        )
+        with self._lock:
+            self.moments.update(X)
+            for j in range(X.shape[1]):
+                self.histograms[j].update(X[:, j])
+                self.sketches[j].update(X[:, j])
+            self.class_counts += np.bincount(predictions, minlength=n_classes)
+            np.add.at(self.confidence_counts, (predictions, confidence_bins), 1)
+            self.confidence_sums += np.bincount(
+                predictions, weights=confidence, minlength=n_classes
+            )
+
+    def snapshot(self):
+        """JSON-serialisable view of the current statistics and drift scores"""
+        with self._lock:
+            count = self.moments.count
+            std = np.sqrt(self.moments.variance)
+            reference_features = (self.reference or {}).get("features", {})
+
+            features = {}
+            for j, name in enumerate(self.feature_names):
+                histogram = self.histograms[j]
+                entry = {
+                    "mean": float(self.moments.mean[j]) if count else None,
+                    "std": float(std[j]) if count else None,
+                    "min": float(self.moments.minimum[j]) if count else None,
+                    "max": float(self.moments.maximum[j]) if count else None,
+                    "quantiles": {
+                        f"p{int(q * 100):02d}": self.sketches[j].quantile(q)
+                        for q in SUMMARY_QUANTILES
+                    },
+                    "histogram": {
+                        "cuts": histogram.cuts.tolist(),
+                        "counts": histogram.counts.tolist(),
+                    },
+                    "psi": None,
+                }
+                if count and name in reference_features:
+                    entry["psi"] = population_stability_index(
+                        reference_features[name]["proportions"], histogram.proportions()
+                    )
+                features[name] = entry
+
+            total = int(self.class_counts.sum())
+            classes = {}
+            for i, name in enumerate(self.class_names):
+                n = int(self.class_counts[i])
+                classes[name] = {
+                    "count": n,
+                    "proportion": n / total if total else 0.0,
+                    "mean_confidence": float(self.confidence_sums[i] / n) if n else None,
+                    "confidence_histogram": self.confidence_counts[i].tolist(),
+                }
+
+            prediction_psi = None
+            confidence_psi = None
+            if total and self.reference is not None:
+                prediction_psi = population_stability_index(
+                    [self.reference["class_proportions"].get(name, 0.0) for name in self.class_names],
+                    self.class_counts / total,
+                )
+                confidence_psi = population_stability_index(
+                    self.reference["confidence_proportions"],
+                    self.confidence_counts.sum(axis=0) / total,
+                )
+
+            return {
+                "count": int(count),
+                "has_reference": self.reference is not None,
+                "features": features,
+                "predictions": {
+                    "classes": classes,
+                    "confidence_bins": np.linspace(0, 1, CONFIDENCE_BINS + 1).tolist(),
+                    "psi": prediction_psi,
+                    "confidence_psi": confidence_psi,
+                },
+                "max_feature_psi": max(
+                    (f["psi"] for f in features.values() if f["psi"] is not None),
+                    default=None,
+                ),
+            }
@@ -0,0 +1,196 @@
+"""
+Online incremental learning from labelled feedback.
+
+Labelled measurements are appended to a bounded buffer. A background thread
+drains it in mini-batches, takes multinomial logistic-regression SGD steps on
+a copy of the live model's weights and publishes the copy together with its
+version in one reference swap. Readers always see either the old or the new
+model and version in full, so inference never takes a lock.
+
+Only multi-class linear models (with ``coef_``) can be updated; for any other
+model the learner stays disabled and status() says why.
+"""
+import copy
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from explain import supports_explanations
+
+
+def softmax(logits):
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def softmax_sgd_step(coef, intercept, X, y, learning_rate, alpha=0.0):
+    """
+    One mini-batch gradient step on the L2-regularised multinomial log-loss.
+
+    Returns new (coef, intercept) arrays; the inputs are left untouched.
+    """
+    probabilities = softmax(X @ coef.T + intercept)
+    probabilities[np.arange(len(y)), y] -= 1.0
+    grad_coef = probabilities.T @ X / len(y) + alpha * coef
+    grad_intercept = probabilities.mean(axis=0)
+    return coef - learning_rate * grad_coef, intercept - learning_rate * grad_intercept
+
+
+class OnlineLearner:
+    """Bounded feedback buffer plus a background copy-on-write model updater"""
+
+    def __init__(self, engine, enabled=True, buffer_size=10_000, batch_size=32,
+                 learning_rate=0.01, alpha=1e-4, max_wait=1.0, accuracy_window=1000):
+        self.engine = engine
+        self.enabled = enabled
+        self.disabled_reason = None if enabled else "IRIS_ONLINE_LEARNING is not set"
+        if enabled and not supports_explanations(engine.model):
+            self.enabled = False
+            self.disabled_reason = (
+                f"{type(engine.model).__name__} is not a multi-class linear model with coef_"
+            )
+        self.batch_size = batch_size
+        self.learning_rate = learning_rate
+        self.alpha = alpha
+        self.max_wait = max_wait
+        self.base_version = engine.version
+
+        self._buffer = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._recent = deque(maxlen=accuracy_window)
+
+        self.received_rows = 0
+        self.dropped_rows = 0
+        self.learned_rows = 0
+        self.swaps = 0
+        self.update_seconds = 0.0
+        self.last_swap_at = None
+        self.update_errors = 0
+        self.failed_rows = 0
+        self.last_error = None
+        self.last_error_at = None
+        self.started_at = time.time()
+
+        self._worker = None
+        if self.enabled:
+            self._worker = threading.Thread(target=self._run, name="iris-online", daemon=True)
+            self._worker.start()
+
+    @classmethod
+    def from_env(cls, engine):
+        """Build from IRIS_ONLINE_* environment variables (disabled by default)"""
+        return cls(
+            engine,
+            enabled=os.environ.get("IRIS_ONLINE_LEARNING", "0") == "1",
+            buffer_size=int(os.environ.get("IRIS_ONLINE_BUFFER_SIZE", "10000")),
+            batch_size=int(os.environ.get("IRIS_ONLINE_BATCH_SIZE", "32")),
+            learning_rate=float(os.environ.get("IRIS_ONLINE_LEARNING_RATE", "0.01")),
+            alpha=float(os.environ.get("IRIS_ONLINE_ALPHA", "0.0001")),
+        )
+
+    def submit(self, features, labels):
+        """Buffer labelled rows; the oldest rows are dropped when the buffer is full"""
+        with self._lock:
+            overflow = len(self._buffer) + len(labels) - self._buffer.maxlen
+            if overflow > 0:
+                self.dropped_rows += overflow
+            self._buffer.extend(zip(features, labels))
+            self.received_rows += len(labels)
+            ready = len(self._buffer) >= self.batch_size
+        if ready:
+            self._wake.set()
+        return len(labels)
+
+    def _take_batch(self, min_rows):
+        with self._lock:
+            if len(self._buffer) < min_rows:
+                self._wake.clear()
+                return None, None
+            n = min(self.batch_size, len(self._buffer))
+            rows = [self._buffer.popleft() for _ in range(n)]
+        features, labels = zip(*rows)
+        return np.array(features), np.array(labels, dtype=np.int64)
+
+    def _run(self):
+        while True:
+            woken = self._wake.wait(self.max_wait)
+
+            # Learn from full mini-batches as soon as they are available, and
+            # from whatever is left once feedback has been idle for max_wait
+            min_rows = self.batch_size if woken else 1
+            while True:
+                X, y = self._take_batch(min_rows)
+                if X is None:
+                    break
+                try:
+                    self._learn(X, y)
+                except Exception as e:
+                    # Keep the current model and the thread alive; the batch is lost
+                    with self._lock:
+                        self.update_errors += 1
+                        self.failed_rows += len(y)
+                        self.last_error = f"{type(e).__name__}: {e}"
+                        self.last_error_at = time.time()
+
+    def _learn(self, X, y):
+        start = time.perf_counter()
+        current = self.engine.model
+
+        # Prequential accuracy: score each batch before learning from it
+        correct = current.predict_proba(X).argmax(axis=1) == y
+
+        coef, intercept = softmax_sgd_step(
+            current.coef_, current.intercept_, X, y, self.learning_rate, self.alpha
+        )
+        updated = copy.copy(current)
+        updated.coef_ = coef
+        updated.intercept_ = intercept
+
+        # Publish model and version in one swap; in-flight requests keep the old pair
+        self.engine.publish(updated, f"{self.base_version}+online.{self.swaps + 1}")
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._recent.extend(correct.tolist())
+            self.learned_rows += len(y)
+            self.swaps += 1
+            self.update_seconds += elapsed
+            self.last_swap_at = time.time()
+
+    def status(self):
+        with self._lock:
+            uptime = time.time() - self.started_at
+            recent = len(self._recent)
+            return {
+                "enabled": self.enabled,
+                "disabled_reason": self.disabled_reason,
+                "healthy": self.last_error_at is None or (
+                    self.last_swap_at is not None and self.last_swap_at > self.last_error_at
+                ),
+                "model_version": self.engine.version,
+                "buffered_rows": len(self._buffer),
+                "buffer_capacity": self._buffer.maxlen,
+                "received_rows": self.received_rows,
+                "dropped_rows": self.dropped_rows,
+                "learned_rows": self.learned_rows,
+                "swaps": self.swaps,
+                "swaps_per_minute": self.swaps / uptime * 60 if uptime else 0.0,
+                "rows_per_second_while_updating": (
+                    self.learned_rows / self.update_seconds if self.update_seconds else None
+                ),
+                "mean_update_ms": (
+                    self.update_seconds / self.swaps * 1000 if self.swaps else None
+                ),
+                "last_swap_at": self.last_swap_at,
+                "update_errors": self.update_errors,
+                "failed_rows": self.failed_rows,
+                "last_error": self.last_error,
+                "last_error_at": self.last_error_at,
+                "rolling_accuracy": sum(self._recent) / recent if recent else None,
+                "rolling_window": recent,
+            }
@@ -0,0 +1,277 @@
+"""
+On-demand sampling profiler for the FastAPI app.
+
+A background thread periodically captures the Python stack of the threads
+that are currently serving a profiled request (or of the event loop thread
+during a profiling window) and aggregates identical stacks into counts.
+Work a profiled request hands to another thread (such as the inference
+executor in concurrency.py) is sampled on that thread when it is submitted
+through SamplingProfiler.bind.
+Aggregated stacks can be exported as collapsed-stack text (for flamegraph.pl
+or speedscope) or as a native speedscope JSON document.
+
+When nothing is being profiled the middleware performs a single attribute
+check per request and the sampler thread sleeps.
+"""
+import contextvars
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_HEADER = b"x-profile-token"
+MAX_DISTINCT_STACKS = 20000
+MAX_STACK_DEPTH = 128
+TRUNCATED_STACK = (("[truncated]", "", 0),)
+
+_profiled_request = contextvars.ContextVar("profiled_request", default=False)
+
+
+class SamplingProfiler:
+    """Aggregating stack sampler that only runs while a profile is active"""
+
+    def __init__(self, token=None, sample_rate=0.0, interval=0.001):
+        self.token = token or None
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.stacks = Counter()
+        self.total_samples = 0
+        self.profiled_requests = 0
+        self.window_until = 0.0
+        self.window_thread = None
+
+        self._lock = threading.Lock()
+        self._active = Counter()
+        self._wake = threading.Event()
+        self._sampler = None
+
+    @classmethod
+    def from_env(cls):
+        """Build a profiler from IRIS_PROFILE_* environment variables"""
+        return cls(
+            token=os.environ.get("IRIS_PROFILE_TOKEN"),
+            sample_rate=float(os.environ.get("IRIS_PROFILE_SAMPLE_RATE", "0")),
+            interval=float(os.environ.get("IRIS_PROFILE_INTERVAL_MS", "1")) / 1000,
+        )
+
+    @property
+    def armed(self):
+        """Whether any request could currently be selected for profiling"""
+        return self.token is not None or self.sample_rate > 0 or self.window_active
+
+    @property
+    def window_active(self):
+        return time.monotonic() < self.window_until
+
+    def check_token(self, value):
+        if self.token is None or value is None:
+            return False
+        return hmac.compare_digest(value.encode(), self.token.encode())
+
+    def should_profile(self, headers):
+        """Decide whether the request with these raw ASGI headers is profiled"""
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return True
+        if self.token is not None:
+            for name, value in headers:
+                if name == PROFILE_HEADER:
+                    return self.check_token(value.decode("latin-1"))
+        return False
+
+    def begin(self, thread_id):
+        with self._lock:
+            self.profiled_requests += 1
+        self.attach(thread_id)
+
+    def end(self, thread_id):
+        self.detach(thread_id)
+
+    def attach(self, thread_id):
+        """Sample ``thread_id`` until the matching detach()"""
+        with self._lock:
+            self._active[thread_id] += 1
+        self._ensure_sampler()
+
+    def detach(self, thread_id):
+        with self._lock:
+            self._active[thread_id] -= 1
+            if self._active[thread_id] <= 0:
+                del self._active[thread_id]
+            if not self._active and not self.window_active:
+                self._wake.clear()
+
+    def bind(self, func):
+        """
+        Wrap ``func`` so the thread that runs it is sampled, if the current
+        request is profiled; otherwise return ``func`` unchanged.
+        """
+        if not _profiled_request.get():
+            return func
+
+        def profiled(*args):
+            thread_id = threading.get_ident()
+            self.attach(thread_id)
+            try:
+                return func(*args)
+            finally:
+                self.detach(thread_id)
+        return profiled
+
+    def start_window(self, seconds, thread_id):
+        """Sample ``thread_id`` continuously for the next ``seconds``"""
+        with self._lock:
+            self.window_until = time.monotonic() + seconds
+            self.window_thread = thread_id
+        self._ensure_sampler()
+
+    def stop_window(self):
+        with self._lock:
+            self.window_until = 0.0
+            self.window_thread = None
+            if not self._active:
+                self._wake.clear()
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.total_samples = 0
+            self.profiled_requests = 0
+
+    def _ensure_sampler(self):
+        self._wake.set()
+        if self._sampler is None or not self._sampler.is_alive():
+            self._sampler = threading.Thread(
+                target=self._run, name="iris-profiler", daemon=True
+            )
+            self._sampler.start()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            self._wake.wait()
+            with self._lock:
+                targets = set(self._active)
+                if self.window_thread is not None:
+                    if self.window_active:
+                        targets.add(self.window_thread)
+                    else:
+                        self.window_thread = None
+                if not targets:
+                    self._wake.clear()
+                    continue
+            frames = sys._current_frames()
+            samples = [
+                _frame_stack(frames[tid]) for tid in targets
+                if tid in frames and tid != own_id
+            ]
+            del frames
+            with self._lock:
+                for stack in samples:
+                    if stack not in self.stacks and len(self.stacks) >= MAX_DISTINCT_STACKS:
+                        stack = TRUNCATED_STACK
+                    self.stacks[stack] += 1
+                    self.total_samples += 1
+            time.sleep(self.interval)
+
+    def status(self):
+        with self._lock:
+            return {
+                "armed": self.armed,
+                "token_configured": self.token is not None,
+                "sample_rate": self.sample_rate,
+                "interval_ms": self.interval * 1000,
+                "window_remaining_s": max(0.0, self.window_until - time.monotonic()),
+                "active_requests": sum(self._active.values()),
+                "profiled_requests": self.profiled_requests,
+                "total_samples": self.total_samples,
+                "distinct_stacks": len(self.stacks),
+            }
+
+    def export_collapsed(self):
+        """Brendan Gregg collapsed-stack format: ``frame;frame;frame count``"""
+        with self._lock:
+            items = list(self.stacks.items())
+        lines = [
+            ";".join(_frame_label(frame) for frame in stack) + f" {count}"
+            for stack, count in sorted(items, key=lambda item: -item[1])
+        ]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def export_speedscope(self, name="iris-api"):
+        """Speedscope sampled-profile JSON document"""
+        with self._lock:
+            items = list(self.stacks.items())
+        frame_index = {}
+        frames = []
+        samples = []
+        weights = []
+        for stack, count in items:
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    func, filename, line = frame
+                    frames.append({"name": func, "file": filename, "line": line})
+                indices.append(frame_index[frame])
+            samples.append(indices)
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": name,
+            "exporter": "iris-api profiling.py",
+        }
+
+
+def _frame_stack(frame):
+    """Root-first tuple of (function, file, line) for a frame chain"""
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, frame.f_lineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def _frame_label(frame):
+    func, filename, line = frame
+    if not filename:
+        return func
+    return f"{func} ({os.path.basename(filename)}:{line})"
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that samples the serving thread of selected requests"""
+
+    def __init__(self, app, profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        profiler = self.profiler
+        if scope["type"] != "http" or not profiler.armed:
+            return await self.app(scope, receive, send)
+        if not profiler.should_profile(scope["headers"]):
+            return await self.app(scope, receive, send)
+
+        thread_id = threading.get_ident()
+        profiler.begin(thread_id)
+        token = _profiled_request.set(True)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _profiled_request.reset(token)
+            profiler.end(thread_id)
@@ -0,0 +1,186 @@
+"""
+Named model registry for serving many classifier variants from one process.
+
+Models live in IRIS_MODELS_DIR as ``<name>.pkl`` and are loaded on first use
+in a thread pool, so the event loop keeps serving while a pickle is read.
+Concurrent requests for a model that is still loading share the same load.
+Loaded models are held in an LRU cache bounded by their estimated total
+size; the least recently used models are evicted to make room.
+
+The cache is only touched from the event loop thread, so it needs no lock.
+"""
+import asyncio
+import os
+import pickle
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from inference import CLASS_NAMES, InferenceEngine
+from monitoring import QuantileSketch
+
+MODEL_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+
+class UnknownModelError(LookupError):
+    """Raised when no model file exists for a requested name"""
+
+
+class ModelStats:
+    """Load, eviction and latency counters for one named model"""
+
+    def __init__(self):
+        self.loads = 0
+        self.load_errors = 0
+        self.load_seconds = 0.0
+        self.evictions = 0
+        self.requests = 0
+        self.rows = 0
+        self.last_used_at = None
+        self.latency = QuantileSketch(64)
+
+    def record(self, rows, seconds):
+        self.requests += 1
+        self.rows += rows
+        self.last_used_at = time.time()
+        self.latency.update(np.array([seconds]))
+
+    def snapshot(self):
+        return {
+            "loads": self.loads,
+            "load_errors": self.load_errors,
+            "mean_load_ms": self.load_seconds / self.loads * 1000 if self.loads else None,
+            "evictions": self.evictions,
+            "requests": self.requests,
+            "rows": self.rows,
+            "last_used_at": self.last_used_at,
+            "latency_ms": {
+                "p50": _ms(self.latency.quantile(0.5)),
+                "p99": _ms(self.latency.quantile(0.99)),
+            },
+        }
+
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1000
+
+
+def model_nbytes(model):
+    """Estimate the in-memory size of a fitted model from its pickled size"""
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class ModelRegistry:
+    """Lazily loaded, memory-bounded LRU cache of named InferenceEngines"""
+
+    def __init__(self, models_dir="models", max_bytes=256 * 1024 * 1024, load_workers=4):
+        self.models_dir = models_dir
+        self.max_bytes = max_bytes
+        self.cached_bytes = 0
+        self.stats = {}
+
+        self._cache = OrderedDict()
+        self._loading = {}
+        self._executor = ThreadPoolExecutor(max_workers=load_workers, thread_name_prefix="iris-models")
+
+    @classmethod
+    def from_env(cls):
+        """Build from IRIS_MODELS_DIR, IRIS_MODELS_CACHE_MB and IRIS_MODELS_LOAD_WORKERS"""
+        return cls(
+            models_dir=os.environ.get("IRIS_MODELS_DIR", "models"),
+            max_bytes=int(float(os.environ.get("IRIS_MODELS_CACHE_MB", "256")) * 1024 * 1024),
+            load_workers=int(os.environ.get("IRIS_MODELS_LOAD_WORKERS", "4")),
+        )
+
+    def path(self, name):
+        """Return the model file for ``name``, rejecting names that could escape the directory"""
+        if not MODEL_NAME_PATTERN.match(name):
+            raise UnknownModelError(f"Invalid model name '{name}'")
+        path = os.path.join(self.models_dir, f"{name}.pkl")
+        if not os.path.isfile(path):
+            raise UnknownModelError(f"Model '{name}' not found")
+        return path
+
+    def available(self):
+        """Names of every model file in the models directory"""
+        if not os.path.isdir(self.models_dir):
+            return []
+        return sorted(
+            name[:-len(".pkl")] for name in os.listdir(self.models_dir)
+            if name.endswith(".pkl") and MODEL_NAME_PATTERN.match(name[:-len(".pkl")])
+        )
+
+    async def get(self, name):
+        """Return the engine for ``name``, loading it in the thread pool if needed"""
+        entry = self._cache.get(name)
+        if entry is not None:
+            self._cache.move_to_end(name)
+            return entry[0]
+
+        # Requests arriving while the model loads share one load task, which
+        # completes (and fills the cache) even if the requests are cancelled
+        task = self._loading.get(name)
+        if task is None:
+            task = asyncio.ensure_future(self._load_and_cache(name, self.path(name)))
+            self._loading[name] = task
+        return await asyncio.shield(task)
+
+    async def _load_and_cache(self, name, path):
+        stats = self.stats.setdefault(name, ModelStats())
+        loop = asyncio.get_running_loop()
+        try:
+            engine, nbytes, seconds = await loop.run_in_executor(self._executor, self._load, path)
+        except Exception:
+            stats.load_errors += 1
+            raise
+        finally:
+            del self._loading[name]
+        stats.loads += 1
+        stats.load_seconds += seconds
+        self._insert(name, engine, nbytes)
+        return engine
+
+    @staticmethod
+    def _load(path):
+        start = time.perf_counter()
+        engine = InferenceEngine.load(path)
+        if not hasattr(engine.model, "predict_proba"):
+            raise TypeError(f"{path} does not contain a probabilistic classifier")
+        classes = getattr(engine.model, "classes_", None)
+        if classes is not None and classes.dtype.kind in "OUS":
+            engine.class_names = [str(c) for c in classes]
+        elif classes is not None and len(classes) != len(CLASS_NAMES):
+            raise ValueError(f"{path} predicts {len(classes)} classes, expected {len(CLASS_NAMES)}")
+        return engine, model_nbytes(engine.model), time.perf_counter() - start
+
+    def _insert(self, name, engine, nbytes):
+        self._cache[name] = (engine, nbytes)
+        self.cached_bytes += nbytes
+
+        # Evict least recently used models, always keeping the one just loaded
+        while self.cached_bytes > self.max_bytes and len(self._cache) > 1:
+            evicted, (_, evicted_bytes) = self._cache.popitem(last=False)
+            self.cached_bytes -= evicted_bytes
+            self.stats[evicted].evictions += 1
+
+    def record(self, name, rows, seconds):
+        self.stats.setdefault(name, ModelStats()).record(rows, seconds)
+
+    def status(self):
+        return {
+            "models_dir": self.models_dir,
+            "available": self.available(),
+            "cache": {
+                "max_bytes": self.max_bytes,
+                "cached_bytes": self.cached_bytes,
+                "loaded": [
+                    {"name": name, "bytes": nbytes, "version": engine.version}
+                    for name, (engine, nbytes) in self._cache.items()
+                ],
+                "loading": sorted(self._loading),
+            },
+            "models": {name: stats.snapshot() for name, stats in sorted(self.stats.items())},
+        }
@@ -0,0 +1,191 @@
+"""
+Pick the serving model family by measured latency as well as accuracy.
+
+    python select_model.py --max-single-p99-ms 1 --max-batch-p99-ms 5
+    python select_model.py --families logistic_regression knn_kdtree --no-export
+
+Trains every candidate family on the Iris training split, then measures
+holdout and cross-validated accuracy, single-row and batched predict latency
+through the same InferenceEngine the API serves with, and pickled size.
+Among the families within the SLOs, the fastest single-row model whose
+accuracy is within --accuracy-tolerance of the best is exported to model.pkl
+(with a matching reference_profile.json), and the full comparison is written
+to model_selection.json.
+
+Only linear models (with ``coef_``) support /explain and online learning;
+the report flags the families that do.
+"""
+import argparse
+import json
+import time
+
+import joblib
+import numpy as np
+from sklearn.datasets import load_iris
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import cross_val_score, train_test_split
+from sklearn.naive_bayes import GaussianNB
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+from estimators import SoftmaxNearestCentroid
+from explain import supports_explanations
+from inference import FEATURE_NAMES, InferenceEngine, synthetic_features
+from monitoring import build_reference_profile
+from registry import model_nbytes
+
+
+CANDIDATES = {
+    "logistic_regression": lambda: LogisticRegression(max_iter=1000, random_state=42),
+    "decision_tree_depth3": lambda: DecisionTreeClassifier(max_depth=3, random_state=42),
+    "nearest_centroid": lambda: SoftmaxNearestCentroid(),
+    "knn_kdtree": lambda: KNeighborsClassifier(n_neighbors=5, algorithm="kd_tree"),
+    "gaussian_nb": lambda: GaussianNB(),
+}
+
+
+def measure_latency(engine, features, iterations):
+    """Per-call latency of engine.predict on ``features`` in milliseconds"""
+    for _ in range(min(iterations, 20)):
+        engine.predict(features)
+    latencies = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        engine.predict(features)
+        latencies[i] = time.perf_counter() - start
+    ms = latencies * 1000
+    return {
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "rows_per_second": float(len(features) / latencies.mean()),
+    }
+
+
+def evaluate(name, model, X_train, y_train, X_test, y_test, args):
+    """Fit one candidate and collect accuracy, latency and size"""
+    cv_scores = cross_val_score(CANDIDATES[name](), X_train, y_train, cv=args.cv)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    engine = InferenceEngine(model)
+    return {
+        "family": name,
+        "holdout_accuracy": float((engine.predict(X_test).predictions == y_test).mean()),
+        "cv_accuracy": float(cv_scores.mean()),
+        "cv_accuracy_std": float(cv_scores.std()),
+        "fit_ms": fit_seconds * 1000,
+        "single": measure_latency(engine, X_test[:1], args.iterations),
+        "batch": measure_latency(engine, synthetic_features(args.batch_size), args.iterations),
+        "batch_size": args.batch_size,
+        "model_bytes": model_nbytes(model),
+        "supports_explain": supports_explanations(model),
+    }
+
+
+def select(results, args):
+    """Fastest single-row model within the SLOs and the accuracy tolerance"""
+    eligible = [
+        r for r in results
+        if r["single"]["p99_ms"] <= args.max_single_p99_ms
+        and r["batch"]["p99_ms"] <= args.max_batch_p99_ms
+        and r["cv_accuracy"] >= args.min_accuracy
+        and (r["supports_explain"] or not args.require_explain)
+    ]
+    if not eligible:
+        return None
+    best_accuracy = max(r["cv_accuracy"] for r in eligible)
+    close = [r for r in eligible if r["cv_accuracy"] >= best_accuracy - args.accuracy_tolerance]
+    return min(close, key=lambda r: r["single"]["p99_ms"])
+
+
+def _limit(value):
+    """JSON-safe SLO limit; no limit is reported as null"""
+    return None if value == float("inf") else value
+
+
+def print_report(results, chosen):
+    print(
+        f"{'family':<22} {'cv acc':>7} {'holdout':>8} {'1-row p50':>10} {'1-row p99':>10}"
+        f" {'batch p99':>10} {'rows/s':>11} {'bytes':>7}  explain"
+    )
+    for r in results:
+        marker = "*" if chosen is r else " "
+        print(
+            f"{marker}{r['family']:<21} {r['cv_accuracy']:>7.3f} {r['holdout_accuracy']:>8.3f}"
+            f" {r['single']['p50_ms']:>8.3f}ms {r['single']['p99_ms']:>8.3f}ms"
+            f" {r['batch']['p99_ms']:>8.3f}ms {r['batch']['rows_per_second']:>11.0f}"
+            f" {r['model_bytes']:>7}  {'yes' if r['supports_explain'] else 'no'}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency-aware model family selection")
+    parser.add_argument("--families", nargs="+", choices=sorted(CANDIDATES), default=list(CANDIDATES))
+    parser.add_argument("--iterations", type=int, default=500, help="Timed predict calls per measurement")
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--cv", type=int, default=5, help="Cross-validation folds on the training split")
+    parser.add_argument("--max-single-p99-ms", type=float, default=float("inf"))
+    parser.add_argument("--max-batch-p99-ms", type=float, default=float("inf"))
+    parser.add_argument("--min-accuracy", type=float, default=0.0)
+    parser.add_argument("--accuracy-tolerance", type=float, default=0.01,
+                        help="Prefer faster models within this cross-validated accuracy of the best")
+    parser.add_argument("--require-explain", action="store_true",
+                        help="Only consider models that support /explain and online learning")
+    parser.add_argument("--report", default="model_selection.json")
+    parser.add_argument("--output", default="model.pkl")
+    parser.add_argument("--profile-output", default="reference_profile.json")
+    parser.add_argument("--no-export", action="store_true", help="Only write the report")
+    args = parser.parse_args()
+
+    iris = load_iris()
+    X_train, X_test, y_train, y_test = train_test_split(
+        iris.data, iris.target, test_size=0.2, random_state=42, stratify=iris.target
+    )
+
+    models = {name: CANDIDATES[name]() for name in args.families}
+    results = [evaluate(name, model, X_train, y_train, X_test, y_test, args) for name, model in models.items()]
+    chosen = select(results, args)
+    print_report(results, chosen)
+
+    with open(args.report, "w") as f:
+        json.dump({
+            "chosen": chosen["family"] if chosen else None,
+            "criteria": {
+                "max_single_p99_ms": _limit(args.max_single_p99_ms),
+                "max_batch_p99_ms": _limit(args.max_batch_p99_ms),
+                "min_accuracy": args.min_accuracy,
+                "accuracy_tolerance": args.accuracy_tolerance,
+                "require_explain": args.require_explain,
+            },
+            "results": results,
+        }, f, indent=2)
+    print(f"\nReport saved as '{args.report}'")
+
+    if chosen is None:
+        print("No model family met the criteria; nothing exported")
+        return
+    print(f"Chosen: {chosen['family']}")
+    if not chosen["supports_explain"]:
+        print("Note: this model is not linear; the API will answer /explain with 400 and disable online learning")
+    if args.no_export:
+        return
+
+    model = models[chosen["family"]]
+    joblib.dump(model, args.output)
+    print(f"Model saved as '{args.output}'")
+
+    profile = build_reference_profile(
+        X_train,
+        y_train,
+        model.predict_proba(X_train),
+        feature_names=FEATURE_NAMES,
+        class_names=list(iris.target_names)
+    )
+    with open(args.profile_output, "w") as f:
+        json.dump(profile, f, indent=2)
+    print(f"Reference profile saved as '{args.profile_output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Off-critical-path shadow scoring of candidate models.
+
+The primary model answers every request. Scored batches are handed to a
+bounded queue and a background thread re-scores them with each candidate
+model, accumulating agreement, probability deltas and candidate latency.
+When the queue is full the batch is dropped and counted, so shadow scoring
+never applies back-pressure to the serving path.
+"""
+import os
+import queue
+import random
+import threading
+import time
+
+import joblib
+import numpy as np
+
+from monitoring import QuantileSketch
+
+
+class CandidateStats:
+    """Running comparison of one candidate model against the primary"""
+
+    def __init__(self, n_classes):
+        self.batches = 0
+        self.rows = 0
+        self.agreements = 0
+        self.errors = 0
+        self.abs_delta_sum = np.zeros(n_classes)
+        self.max_abs_delta = 0.0
+        self.latency_total = 0.0
+        self.latency_per_row = QuantileSketch(64)
+        self.latency = QuantileSketch(64)
+        self.confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+
+    def update(self, primary_predictions, primary_probabilities, probabilities, seconds):
+        n_rows, n_classes = primary_probabilities.shape
+        predictions = probabilities.argmax(axis=1)
+        deltas = np.abs(probabilities - primary_probabilities)
+        self.batches += 1
+        self.rows += n_rows
+        self.agreements += int(np.count_nonzero(predictions == primary_predictions))
+        self.abs_delta_sum += deltas.sum(axis=0)
+        self.max_abs_delta = max(self.max_abs_delta, float(deltas.max()))
+        self.latency_total += seconds
+        self.latency.update(np.array([seconds]))
+        self.latency_per_row.update(np.array([seconds / n_rows]))
+        self.confusion += np.bincount(
+            primary_predictions * n_classes + predictions, minlength=n_classes * n_classes
+        ).reshape(n_classes, n_classes)
+
+    def snapshot(self, class_names):
+        rows = self.rows
+        return {
+            "batches": self.batches,
+            "rows": rows,
+            "errors": self.errors,
+            "agreement_rate": self.agreements / rows if rows else None,
+            "mean_abs_probability_delta": {
+                name: float(self.abs_delta_sum[i] / rows) if rows else None
+                for i, name in enumerate(class_names)
+            },
+            "max_abs_probability_delta": self.max_abs_delta if rows else None,
+            "latency_ms": {
+                "mean_per_batch": self.latency_total / self.batches * 1000 if self.batches else None,
+                "p50_per_batch": _ms(self.latency.quantile(0.5)),
+                "p99_per_batch": _ms(self.latency.quantile(0.99)),
+                "p50_per_row": _ms(self.latency_per_row.quantile(0.5)),
+            },
+            "confusion_vs_primary": {
+                "labels": list(class_names),
+                "matrix": self.confusion.tolist(),
+            },
+        }
+
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1000
+
+
+class ShadowScorer:
+    """Bounded background queue that scores primary traffic with candidate models"""
+
+    def __init__(self, candidates, class_names, max_queued_rows=100_000, sample_rate=1.0):
+        self.candidates = dict(candidates)
+        self.class_names = list(class_names)
+        for name, candidate in self.candidates.items():
+            if len(getattr(candidate, "classes_", ())) != len(self.class_names):
+                raise ValueError(f"Shadow model '{name}' does not predict {len(self.class_names)} classes")
+        self.max_queued_rows = max_queued_rows
+        self.sample_rate = sample_rate
+        self.stats = {name: CandidateStats(len(self.class_names)) for name in self.candidates}
+        self.submitted_rows = 0
+        self.dropped_batches = 0
+        self.dropped_rows = 0
+
+        self._queue = queue.SimpleQueue()
+        self._queued_rows = 0
+        self._lock = threading.Lock()
+        self._worker = None
+        if self.candidates:
+            self._worker = threading.Thread(target=self._run, name="iris-shadow", daemon=True)
+            self._worker.start()
+
+    @classmethod
+    def from_env(cls, class_names):
+        """
+        Load candidates listed in IRIS_SHADOW_MODELS.
+
+        The variable is a comma-separated list of ``name=path`` entries (or bare
+        paths, named after the file stem).
+        """
+        candidates = {}
+        for entry in filter(None, os.environ.get("IRIS_SHADOW_MODELS", "").split(",")):
+            name, _, path = entry.strip().rpartition("=")
+            if not name:
+                name = os.path.splitext(os.path.basename(path))[0]
+            candidates[name] = joblib.load(path)
+        return cls(
+            candidates,
+            class_names,
+            max_queued_rows=int(os.environ.get("IRIS_SHADOW_QUEUE_ROWS", "100000")),
+            sample_rate=float(os.environ.get("IRIS_SHADOW_SAMPLE_RATE", "1.0")),
+        )
+
+    @property
+    def enabled(self):
+        return bool(self.candidates)
+
+    def submit(self, features, predictions, probabilities):
+        """
+        Queue a scored batch for shadow scoring without blocking.
+
+        The arrays are built per request and never mutated afterwards, so they
+        are handed over by reference. Returns False if the batch was dropped.
+        """
+        if not self.candidates:
+            return False
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        n_rows = features.shape[0]
+        with self._lock:
+            if self._queued_rows + n_rows > self.max_queued_rows:
+                self.dropped_batches += 1
+                self.dropped_rows += n_rows
+                return False
+            self._queued_rows += n_rows
+            self.submitted_rows += n_rows
+        self._queue.put((features, predictions, probabilities))
+        return True
+
+    def warm_up(self, features):
+        """Score ``features`` with every candidate once, outside the statistics"""
+        for candidate in self.candidates.values():
+            candidate.predict_proba(features)
+
+    def _run(self):
+        while True:
+            features, predictions, probabilities = self._queue.get()
+            for name, candidate in self.candidates.items():
+                stats = self.stats[name]
+                try:
+                    start = time.perf_counter()
+                    candidate_probabilities = candidate.predict_proba(features)
+                    elapsed = time.perf_counter() - start
+                except Exception:
+                    with self._lock:
+                        stats.errors += 1
+                    continue
+                with self._lock:
+                    stats.update(predictions, probabilities, candidate_probabilities, elapsed)
+            with self._lock:
+                self._queued_rows -= features.shape[0]
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "sample_rate": self.sample_rate,
+                "queue": {
+                    "queued_rows": self._queued_rows,
+                    "max_queued_rows": self.max_queued_rows,
+                    "submitted_rows": self.submitted_rows,
+                    "dropped_batches": self.dropped_batches,
+                    "dropped_rows": self.dropped_rows,
+                },
+                "candidates": {
+                    name: stats.snapshot(self.class_names)
+                    for name, stats in self.stats.items()
+                },
+            }
@@ -116,6 +116,145 @@ def test_batch_prediction():
     except Exception as e:
         print(f"❌ Batch test failed: {e}")
 
+def test_stats_endpoint():
+    """Test the drift statistics endpoint"""
+    print("\n" + "="*50)
+    print("TESTING STATS ENDPOINT")
+    print("="*50)
+    
+    try:
+        response = requests.get(f"{BASE_URL}/stats")
+        
+        if response.status_code == 200:
+            result = response.json()
+            print(f"Rows observed: {result['count']}")
+            print(f"Max feature PSI: {result['max_feature_psi']}")
+            for species, stats in result["predictions"]["classes"].items():
+                print(f"  {species}: {stats['count']} predictions")
+        else:
+            print(f"❌ Stats request failed: {response.status_code}")
+            print(response.text)
+            
+    except Exception as e:
+        print(f"❌ Stats test failed: {e}")
+
+def test_explain_endpoint():
+    """Check that explanations add up and agree with /predict"""
+    print("\n" + "="*50)
+    print("TESTING EXPLAIN ENDPOINT")
+    print("="*50)
+    
+    for example in test_examples:
+        try:
+            response = requests.post(f"{BASE_URL}/explain", json=example["data"])
+            
+            print(f"\n{example['name']}:")
+            if response.status_code == 400:
+                print(f"ℹ️ Explanations not supported: {response.json()['detail']}")
+                return
+            if response.status_code != 200:
+                print(f"❌ Explain request failed: {response.status_code}")
+                print(response.text)
+                continue
+            result = response.json()
+            
+            # Each logit is its intercept plus the summed feature contributions
+            consistent = all(
+                abs(result["logits"][species] - result["intercepts"][species]
+                    - sum(result["contributions"][species].values())) < 1e-6
+                for species in result["logits"]
+            )
+            print("✅ Contributions sum to logits" if consistent else "❌ Contributions do NOT sum to logits")
+            
+            prediction = requests.post(f"{BASE_URL}/predict", json=example["data"]).json()
+            if result["species"] == prediction["species"]:
+                print(f"✅ Explained species matches /predict ({result['species']})")
+            else:
+                print(f"❌ Explained species {result['species']} != predicted {prediction['species']}")
+                
+        except Exception as e:
+            print(f"❌ Explain test failed: {e}")
+
+def test_summary_endpoint():
+    """Check that the aggregate counts cover every row"""
+    print("\n" + "="*50)
+    print("TESTING SUMMARY ENDPOINT")
+    print("="*50)
+    
+    batch_data = [example["data"] for example in test_examples] * 10
+    
+    try:
+        response = requests.post(f"{BASE_URL}/predict/summary", json=batch_data)
+        
+        if response.status_code == 200:
+            result = response.json()
+            print(f"Total: {result['total']}, counts: {result['counts']}")
+            if result["total"] == len(batch_data) == sum(result["counts"].values()):
+                print("✅ Species counts add up to the total")
+            else:
+                print("❌ Species counts do NOT add up to the total")
+            if sum(result["confidence_histogram"]) == result["total"]:
+                print("✅ Confidence histogram covers every row")
+            else:
+                print("❌ Confidence histogram does NOT cover every row")
+        else:
+            print(f"❌ Summary request failed: {response.status_code}")
+            print(response.text)
+            
+    except Exception as e:
+        print(f"❌ Summary test failed: {e}")
+
+def test_feedback_endpoint():
+    """Submit labelled rows for online learning (skipped when it is disabled)"""
+    print("\n" + "="*50)
+    print("TESTING FEEDBACK ENDPOINT")
+    print("="*50)
+    
+    feedback = [dict(example["data"], species=example["expected"]) for example in test_examples]
+    
+    try:
+        response = requests.post(f"{BASE_URL}/feedback", json=feedback)
+        
+        if response.status_code == 503:
+            print(f"ℹ️ {response.json()['detail']}")
+        elif response.status_code == 200 and response.json()["accepted"] == len(feedback):
+            print(f"✅ {len(feedback)} rows accepted")
+            stats = requests.get(f"{BASE_URL}/feedback/stats").json()
+            print(f"Received rows: {stats['received_rows']}, swaps: {stats['swaps']}, healthy: {stats['healthy']}")
+        else:
+            print(f"❌ Feedback request failed: {response.status_code}")
+            print(response.text)
+            
+    except Exception as e:
+        print(f"❌ Feedback test failed: {e}")
+
+def test_named_models():
+    """Predict with each model in the models directory"""
+    print("\n" + "="*50)
+    print("TESTING NAMED MODELS")
+    print("="*50)
+    
+    try:
+        available = requests.get(f"{BASE_URL}/models").json()["available"]
+        if not available:
+            print("ℹ️ No models in IRIS_MODELS_DIR")
+        
+        for name in available:
+            response = requests.post(f"{BASE_URL}/models/{name}/predict", json=test_examples[0]["data"])
+            if response.status_code == 200:
+                print(f"✅ {name}: {response.json()['species']}")
+            else:
+                print(f"❌ {name}: {response.status_code} {response.text}")
+        
+        response = requests.post(f"{BASE_URL}/models/does-not-exist/predict", json=test_examples[0]["data"])
+        if response.status_code == 404:
+            print("✅ Unknown model correctly rejected")
+        else:
+            print(f"❌ Unknown model returned {response.status_code}")
+            
+    except Exception as e:
+        print(f"❌ Named model test failed: {e}")
+
 def test_invalid_input():
     """Test error handling with invalid input"""
     print("\n" + "="*50)
@@ -182,6 +321,11 @@ if __name__ == "__main__":
         # Test prediction endpoints
         test_prediction_endpoint()
         test_batch_prediction()
+        test_stats_endpoint()
+        test_explain_endpoint()
+        test_summary_endpoint()
+        test_feedback_endpoint()
+        test_named_models()
         test_invalid_input()
         
         print("\n" + "="*50)
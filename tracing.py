@@ -0,0 +1,469 @@
+"""
+Structured per-request tracing with OpenTelemetry-compatible export.
+
+Each sampled HTTP request becomes one trace: a root server span plus child
+spans for receiving the body, parsing/validation, the endpoint handler (with
+any spans it opens, e.g. inference) and response serialization. Finished
+spans are queued and exported in batches by a background thread as OTLP/JSON,
+either to rotating local files or to an OTLP/HTTP collector endpoint.
+
+Request IDs are taken from the X-Request-ID header (or generated) and echoed
+back; W3C ``traceparent`` headers are honoured for trace IDs and sampling.
+
+When tracing is disabled the middleware passes requests straight through and
+``span()`` returns a shared no-op context manager.
+
+A minimal local collector for testing:
+
+    python tracing.py collect --port 4318 --output spans.jsonl
+"""
+import argparse
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from warmup import in_warmup
+
+REQUEST_ID_HEADER = b"x-request-id"
+TRACEPARENT_HEADER = b"traceparent"
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """A finished or in-progress span, stored in OTLP field terms"""
+
+    __slots__ = ("trace_id", "span_id", "parent_span_id", "name", "kind",
+                 "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, trace_id, parent_span_id, name, kind=SPAN_KIND_INTERNAL,
+                 start_ns=None, attributes=None):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.status = STATUS_OK
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def to_otlp(self):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class _Trace:
+    """Per-request trace state carried in a context variable"""
+
+    __slots__ = ("root", "spans", "stack", "body_received_ns", "handler_start_ns", "handler_end_ns")
+
+    def __init__(self, root):
+        self.root = root
+        self.spans = [root]
+        self.stack = [root]
+        self.body_received_ns = None
+        self.handler_start_ns = None
+        self.handler_end_ns = None
+
+
+class Tracer:
+    """Sampling decisions, span creation and hand-off to the batch exporter"""
+
+    def __init__(self, exporter=None, sample_rate=1.0, service_name="iris-api",
+                 max_queue=10_000, batch_size=512, flush_interval=2.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.service_name = service_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.exported_spans = 0
+        self.dropped_spans = 0
+        self.export_errors = 0
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._worker = None
+        if exporter is not None:
+            self._worker = threading.Thread(target=self._run, name="iris-tracing", daemon=True)
+            self._worker.start()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build from IRIS_TRACE_* environment variables.
+
+        IRIS_TRACE_FILE enables export to rotating OTLP/JSON-lines files and
+        IRIS_TRACE_ENDPOINT to an OTLP/HTTP collector; without either, tracing
+        is disabled.
+        """
+        exporter = None
+        if os.environ.get("IRIS_TRACE_ENDPOINT"):
+            exporter = HttpSpanExporter(os.environ["IRIS_TRACE_ENDPOINT"])
+        elif os.environ.get("IRIS_TRACE_FILE"):
+            exporter = FileSpanExporter(
+                os.environ["IRIS_TRACE_FILE"],
+                max_bytes=int(os.environ.get("IRIS_TRACE_MAX_BYTES", str(10 * 1024 * 1024))),
+                backup_count=int(os.environ.get("IRIS_TRACE_BACKUPS", "5")),
+            )
+        return cls(
+            exporter,
+            sample_rate=float(os.environ.get("IRIS_TRACE_SAMPLE_RATE", "1.0")),
+            service_name=os.environ.get("IRIS_TRACE_SERVICE_NAME", "iris-api"),
+        )
+
+    @property
+    def enabled(self):
+        return self.exporter is not None
+
+    def span(self, name, **attributes):
+        """Child span of the current request's active span (no-op if untraced)"""
+        trace = _current_trace.get()
+        if trace is None:
+            return NOOP_SPAN
+        return self._span(trace, name, attributes)
+
+    @contextmanager
+    def _span(self, trace, name, attributes):
+        parent = trace.stack[-1]
+        span = Span(parent.trace_id, parent.span_id, name, attributes=attributes)
+        trace.spans.append(span)
+        trace.stack.append(span)
+        try:
+            yield span
+        except BaseException:
+            span.status = STATUS_ERROR
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            trace.stack.pop()
+
+    def set_attributes(self, **attributes):
+        """Attach attributes to the request's root span"""
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.root.attributes.update(attributes)
+
+    def handler(self, func):
+        """Decorator marking an endpoint's execution inside the request trace"""
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return await func(*args, **kwargs)
+            trace.handler_start_ns = time.time_ns()
+            try:
+                with self._span(trace, "handler", {"code.function": func.__name__}):
+                    return await func(*args, **kwargs)
+            finally:
+                trace.handler_end_ns = time.time_ns()
+        return wrapper
+
+    def _submit(self, spans):
+        for span in spans:
+            try:
+                self._queue.put_nowait(span)
+            except queue.Full:
+                self.dropped_spans += 1
+
+    def _run(self):
+        while True:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self.exporter.export(self._otlp_document(batch))
+                    self.exported_spans += len(batch)
+                except Exception:
+                    self.export_errors += 1
+
+    def _otlp_document(self, spans):
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "iris-api.tracing"},
+                    "spans": [span.to_otlp() for span in spans],
+                }],
+            }]
+        }
+
+    def status(self):
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "exporter": type(self.exporter).__name__ if self.exporter else None,
+            "queued_spans": self._queue.qsize(),
+            "exported_spans": self.exported_spans,
+            "dropped_spans": self.dropped_spans,
+            "export_errors": self.export_errors,
+        }
+
+
+class FileSpanExporter:
+    """Appends one OTLP/JSON document per line, rotating by size"""
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def export(self, document):
+        line = json.dumps(document, separators=(",", ":")) + "\n"
+        if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "a") as f:
+            f.write(line)
+
+
+class HttpSpanExporter:
+    """POSTs OTLP/JSON documents to a collector (e.g. http://localhost:4318/v1/traces)"""
+
+    def __init__(self, endpoint, timeout=5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, document):
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(document, separators=(",", ":")).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def _parse_traceparent(value):
+    """Return (trace_id, parent_span_id, sampled) from a W3C traceparent header"""
+    parts = value.split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware creating one trace per sampled HTTP request.
+
+    Every response carries X-Request-ID (the caller's, or a generated one),
+    even when tracing is disabled or the request is not sampled.
+    """
+
+    def __init__(self, app, tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        tracer = self.tracer
+        if scope["type"] != "http" or in_warmup.get():
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        parent = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")
+            elif name == TRACEPARENT_HEADER:
+                parent = _parse_traceparent(value.decode("latin-1"))
+        if not request_id:
+            request_id = secrets.token_hex(16)
+        request_id_header = (REQUEST_ID_HEADER, request_id.encode("latin-1"))
+
+        if not tracer.enabled:
+            sampled = False
+        elif parent is not None:
+            trace_id, parent_span_id, sampled = parent
+        else:
+            trace_id, parent_span_id = secrets.token_hex(16), None
+            sampled = random.random() < tracer.sample_rate
+
+        if not sampled:
+            async def send_with_id(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [request_id_header]
+                await send(message)
+            return await self.app(scope, receive, send_with_id)
+
+        root = Span(
+            trace_id,
+            parent_span_id,
+            f"{scope['method']} {scope['path']}",
+            kind=SPAN_KIND_SERVER,
+            attributes={
+                "http.request.method": scope["method"],
+                "url.path": scope["path"],
+                "request.id": request_id,
+            },
+        )
+        trace = _Trace(root)
+        token = _current_trace.set(trace)
+        response_start_ns = None
+
+        async def traced_receive():
+            message = await receive()
+            if message["type"] == "http.request" and not message.get("more_body", False):
+                trace.body_received_ns = time.time_ns()
+            return message
+
+        async def traced_send(message):
+            nonlocal response_start_ns
+            if message["type"] == "http.response.start":
+                response_start_ns = time.time_ns()
+                root.attributes["http.response.status_code"] = message["status"]
+                if message["status"] >= 500:
+                    root.status = STATUS_ERROR
+                message["headers"] = list(message.get("headers", [])) + [
+                    request_id_header,
+                    (b"traceparent", f"00-{trace_id}-{root.span_id}-01".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, traced_receive, traced_send)
+        except BaseException:
+            root.status = STATUS_ERROR
+            raise
+        finally:
+            _current_trace.reset(token)
+            root.end_ns = time.time_ns()
+            self._add_phase_spans(trace, response_start_ns)
+            tracer._submit(trace.spans)
+
+    @staticmethod
+    def _add_phase_spans(trace, response_start_ns):
+        """Derive receive / parse+validate / serialize spans from recorded timestamps"""
+        root = trace.root
+        phases = []
+        if trace.body_received_ns is not None:
+            phases.append(("request.receive", root.start_ns, trace.body_received_ns))
+        # FastAPI decodes the JSON body and runs pydantic validation in one
+        # step; requests rejected by validation never reach the handler
+        validated_at = trace.handler_start_ns or response_start_ns
+        if validated_at is not None and trace.body_received_ns is not None:
+            phases.append(("request.parse_validate", trace.body_received_ns, validated_at))
+        if trace.handler_end_ns is not None:
+            # Covers response model validation, JSON encoding and sending the body
+            phases.append(("response.serialize", trace.handler_end_ns, root.end_ns))
+        for name, start_ns, end_ns in phases:
+            span = Span(root.trace_id, root.span_id, name, start_ns=start_ns)
+            span.end_ns = end_ns
+            trace.spans.append(span)
+        if response_start_ns is not None:
+            root.attributes["http.response.start_offset_ms"] = (response_start_ns - root.start_ns) / 1e6
+
+
+def run_collector(port, output):
+    """Minimal OTLP/HTTP JSON collector that appends received documents to a file"""
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                document = json.loads(body)
+            except ValueError:
+                self.send_response(400)
+                self.end_headers()
+                return
+            with lock, open(output, "a") as f:
+                f.write(json.dumps(document, separators=(",", ":")) + "\n")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    print(f"Collecting OTLP/JSON spans on http://127.0.0.1:{port}/v1/traces into {output}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tracing utilities")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    collect = subparsers.add_parser("collect", help="Run a local OTLP/HTTP JSON collector stub")
+    collect.add_argument("--port", type=int, default=4318)
+    collect.add_argument("--output", default="spans.jsonl")
+    args = parser.parse_args()
+    run_collector(args.port, args.output)
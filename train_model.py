@@ -1,13 +1,36 @@
 """
 Train and save the Iris flower classification model
+
+    python train_model.py                                 # classic in-memory Iris training
+    python train_model.py --data "shards/*.csv" --memory-mb 512
+                                                          # out-of-core training on shards
 """
 from sklearn.datasets import load_iris
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, classification_report
+import argparse
+import glob
+import itertools
 import joblib
+import json
+import os
+import sys
+import time
+import numpy as np
+
+from inference import CLASS_NAMES, FEATURE_NAMES
+from monitoring import (
+    CONFIDENCE_BINS, FixedHistogram, QuantileSketch, RunningMoments,
+    build_reference_profile, reference_profile_from_counts
+)
+from online import softmax, softmax_sgd_step
+
+# Rough working-set bytes per row while a chunk is parsed and trained on,
+# used to turn --memory-mb into a chunk size
+ROW_BYTES = {".csv": 1024, ".parquet": 256, ".npy": 256}
 
-def train_iris_model():
+def train_iris_model(model_path="model.pkl", profile_path="reference_profile.json"):
     """Train and save the Iris classification model"""
     
     # Load the Iris dataset
@@ -32,10 +55,331 @@ def train_iris_model():
     print(classification_report(y_test, y_pred, target_names=iris.target_names))
     
     # Save the model
-    joblib.dump(model, "model.pkl")
-    print("\nModel saved as 'model.pkl'")
+    joblib.dump(model, model_path)
+    print(f"\nModel saved as '{model_path}'")
+    
+    # Save the training distribution used by the API for drift detection
+    profile = build_reference_profile(
+        X_train,
+        y_train,
+        model.predict_proba(X_train),
+        feature_names=FEATURE_NAMES,
+        class_names=list(iris.target_names)
+    )
+    with open(profile_path, "w") as f:
+        json.dump(profile, f, indent=2)
+    print(f"Reference profile saved as '{profile_path}'")
     
     return model, iris.target_names
 
+def encode_labels(labels):
+    """Map species names (or integer indices) to class indices"""
+    uniques, inverse = np.unique(labels, return_inverse=True)
+    mapping = []
+    for value in uniques.tolist():
+        if isinstance(value, str) and value in CLASS_NAMES:
+            mapping.append(CLASS_NAMES.index(value))
+            continue
+        try:
+            index = float(value)
+        except (TypeError, ValueError):
+            index = None
+        # Numeric labels must be whole class indices, as for .npy shards
+        if index is not None and index.is_integer() and 0 <= index < len(CLASS_NAMES):
+            mapping.append(int(index))
+        else:
+            raise ValueError(f"Unknown species label: {value!r}")
+    return np.array(mapping, dtype=np.int64)[inverse]
+
+def iter_csv_chunks(path, chunk_rows, label_column):
+    """Yield (features, labels) chunks from a CSV file with a header row"""
+    with open(path, newline="") as f:
+        header = f.readline().strip().split(",")
+        feature_idx = [header.index(name) for name in FEATURE_NAMES]
+        label_idx = header.index(label_column)
+        while True:
+            lines = list(itertools.islice(f, chunk_rows))
+            if not lines:
+                return
+            block = np.loadtxt(lines, delimiter=",", dtype=str, ndmin=2)
+            yield block[:, feature_idx].astype(float), encode_labels(block[:, label_idx])
+
+def iter_parquet_chunks(path, chunk_rows, label_column):
+    """Yield (features, labels) chunks from a Parquet file (requires pyarrow)"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Reading Parquet shards requires pyarrow: pip install pyarrow")
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=FEATURE_NAMES + [label_column]):
+        features = np.column_stack([
+            batch.column(name).to_numpy(zero_copy_only=False).astype(float)
+            for name in FEATURE_NAMES
+        ])
+        yield features, encode_labels(batch.column(label_column).to_numpy(zero_copy_only=False))
+
+def iter_npy_chunks(path, chunk_rows, label_column):
+    """
+    Yield (features, labels) chunks from an (n, 5) .npy array.
+    
+    Columns are the four measurements followed by the class index. The file is
+    memory-mapped, so only the current chunk is read into memory.
+    """
+    data = np.load(path, mmap_mode="r")
+    if data.ndim != 2 or data.shape[1] != len(FEATURE_NAMES) + 1:
+        raise ValueError(f"{path}: expected an (n, {len(FEATURE_NAMES) + 1}) array")
+    for start in range(0, data.shape[0], chunk_rows):
+        chunk = np.array(data[start:start + chunk_rows], dtype=float)
+        labels = chunk[:, -1]
+        if ((labels < 0) | (labels >= len(CLASS_NAMES)) | (labels != np.floor(labels))).any():
+            raise ValueError(f"{path}: class indices must be integers in [0, {len(CLASS_NAMES)})")
+        yield chunk[:, :-1], labels.astype(np.int64)
+
+SHARD_READERS = {".csv": iter_csv_chunks, ".parquet": iter_parquet_chunks, ".npy": iter_npy_chunks}
+
+def iter_chunks(paths, chunk_rows, label_column, start=0):
+    """Yield (global row offset, features, labels) for every chunk of every shard"""
+    offset = start
+    for path in paths:
+        reader = SHARD_READERS[os.path.splitext(path)[1].lower()]
+        for features, labels in reader(path, chunk_rows, label_column):
+            yield offset, features, labels
+            offset += len(labels)
+
+def iter_interleaved_chunks(paths, shard_rows, chunk_rows, label_column, rng):
+    """
+    Yield (global row offset, features, labels) chunks drawn from all shards at once.
+    
+    Each chunk comes from a shard picked at random in proportion to its unread
+    rows, so shards holding one class (or one time range) are mixed instead of
+    being visited one after another. Offsets are the same as iter_chunks gives,
+    so the holdout split does not change.
+    """
+    readers = [SHARD_READERS[os.path.splitext(path)[1].lower()](path, chunk_rows, label_column) for path in paths]
+    offsets = np.concatenate([[0], np.cumsum(shard_rows)[:-1]]).astype(np.int64)
+    remaining = np.array(shard_rows, dtype=np.float64)
+    while remaining.sum() > 0:
+        i = rng.choice(len(paths), p=remaining / remaining.sum())
+        features, labels = next(readers[i], (None, None))
+        if features is None:
+            remaining[i] = 0
+            continue
+        yield int(offsets[i]), features, labels
+        offsets[i] += len(labels)
+        remaining[i] = max(remaining[i] - len(labels), 0)
+
+def iter_shuffled_batches(chunks, capacity, batch_size, rng):
+    """
+    Yield (features, labels) mini-batches through a bounded shuffle buffer.
+    
+    Chunks fill a buffer of up to ``capacity`` rows; once it is full, half of
+    it is shuffled out as mini-batches and the rest stays to mix with later
+    chunks. Whatever is left at the end is shuffled and emitted too.
+    """
+    buffer_X, buffer_y, buffered = [], [], 0
+    for X, y in chunks:
+        buffer_X.append(X)
+        buffer_y.append(y)
+        buffered += len(y)
+        if buffered < capacity:
+            continue
+        X_all, y_all = np.concatenate(buffer_X), np.concatenate(buffer_y)
+        order = rng.permutation(buffered)
+        emit, keep = order[:buffered // 2], order[buffered // 2:]
+        for start in range(0, len(emit), batch_size):
+            batch = emit[start:start + batch_size]
+            yield X_all[batch], y_all[batch]
+        buffer_X, buffer_y, buffered = [X_all[keep]], [y_all[keep]], len(keep)
+    if buffered:
+        X_all, y_all = np.concatenate(buffer_X), np.concatenate(buffer_y)
+        order = rng.permutation(buffered)
+        for start in range(0, buffered, batch_size):
+            batch = order[start:start + batch_size]
+            yield X_all[batch], y_all[batch]
+
+def holdout_mask(offset, n, fraction):
+    """Deterministic pseudo-random holdout selection by global row index"""
+    index = np.arange(offset, offset + n, dtype=np.uint64)
+    hashed = (index * np.uint64(2654435761)) & np.uint64(0xFFFFFFFF)
+    return hashed < np.uint64(int(fraction * 2 ** 32))
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, if the platform reports it"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def train_out_of_core(paths, memory_mb=512, epochs=5, batch_size=256, learning_rate=0.1,
+                      alpha=1e-4, holdout=0.1, label_column="species", seed=42,
+                      model_path="model.pkl", profile_path="reference_profile.json"):
+    """
+    Train the serving model on shards that do not fit in memory.
+    
+    Pass 1 streams every shard once to compute scaling statistics and feature
+    quantiles. Each epoch then streams the shards again, interleaved at random
+    and mixed in a bounded shuffle buffer, and takes mini-batch SGD steps on
+    the standardised training rows. A final pass evaluates the
+    holdout rows and builds the drift reference profile. Only one chunk is in
+    memory at a time; its size is derived from ``memory_mb``.
+    """
+    extensions = {os.path.splitext(path)[1].lower() for path in paths}
+    unknown = extensions - set(SHARD_READERS)
+    if unknown:
+        raise ValueError(f"Unsupported shard type(s): {', '.join(sorted(unknown))}")
+    row_bytes = max(ROW_BYTES[ext] for ext in extensions)
+    chunk_rows = max(1024, memory_mb * 1024 * 1024 // (2 * row_bytes))
+    print(f"Streaming {len(paths)} shard(s) in chunks of {chunk_rows} rows (memory cap {memory_mb} MB)")
+    
+    n_features = len(FEATURE_NAMES)
+    n_classes = len(CLASS_NAMES)
+    
+    # Pass 1: one-pass scaling statistics and quantile sketches on training rows
+    start = time.perf_counter()
+    moments = RunningMoments(n_features)
+    sketches = [QuantileSketch(256) for _ in FEATURE_NAMES]
+    class_counts = np.zeros(n_classes, dtype=np.int64)
+    shard_rows = []
+    total_rows = 0
+    for path in paths:
+        shard_start = total_rows
+        for offset, X, y in iter_chunks([path], chunk_rows, label_column, start=shard_start):
+            train = ~holdout_mask(offset, len(y), holdout)
+            moments.update(X[train])
+            for j, sketch in enumerate(sketches):
+                sketch.update(X[train, j])
+            class_counts += np.bincount(y[train], minlength=n_classes)
+            total_rows += len(y)
+        shard_rows.append(total_rows - shard_start)
+    elapsed = time.perf_counter() - start
+    if moments.count == 0:
+        raise ValueError("No training rows found in the given shards")
+    print(f"Statistics pass: {total_rows} rows, {total_rows / elapsed:,.0f} rows/s")
+    
+    mean = moments.mean
+    scale = np.sqrt(moments.variance)
+    scale[scale == 0] = 1.0
+    
+    # Epochs of mini-batch SGD on standardised features. SGD needs rows in
+    # random order, but shards are often sorted (one class or one period per
+    # file), so each epoch reads smaller chunks from all shards interleaved at
+    # random and mixes them in a shuffle buffer of one full chunk.
+    rng = np.random.RandomState(seed)
+    read_rows = max(batch_size, chunk_rows // 8)
+    coef = np.zeros((n_classes, n_features))
+    intercept = np.zeros(n_classes)
+    
+    def training_chunks():
+        for offset, X, y in iter_interleaved_chunks(paths, shard_rows, read_rows, label_column, rng):
+            train = ~holdout_mask(offset, len(y), holdout)
+            yield (X[train] - mean) / scale, y[train]
+    
+    for epoch in range(epochs):
+        start = time.perf_counter()
+        epoch_rate = learning_rate / np.sqrt(epoch + 1)
+        rows = 0
+        for X, y in iter_shuffled_batches(training_chunks(), chunk_rows, batch_size, rng):
+            coef, intercept = softmax_sgd_step(coef, intercept, X, y, epoch_rate, alpha)
+            rows += len(y)
+        elapsed = time.perf_counter() - start
+        print(f"Epoch {epoch + 1}/{epochs}: {rows} rows, {rows / elapsed:,.0f} rows/s")
+    
+    # Fold the scaling into the weights so the artifact takes raw measurements
+    raw_coef = coef / scale
+    raw_intercept = intercept - (coef * mean / scale).sum(axis=1)
+    model = LogisticRegression(max_iter=epochs, random_state=seed)
+    model.classes_ = np.arange(n_classes)
+    model.coef_ = raw_coef
+    model.intercept_ = raw_intercept
+    model.n_features_in_ = n_features
+    model.n_iter_ = np.array([epochs], dtype=np.int32)
+    
+    # Final pass: streamed holdout evaluation and drift reference histograms
+    start = time.perf_counter()
+    histograms = [
+        FixedHistogram(np.unique([sketch.quantile(q) for q in np.linspace(0, 1, 11)[1:-1]]))
+        for sketch in sketches
+    ]
+    confidence_counts = np.zeros(CONFIDENCE_BINS, dtype=np.int64)
+    confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+    log_loss_sum = 0.0
+    for offset, X, y in iter_chunks(paths, chunk_rows, label_column):
+        held_out = holdout_mask(offset, len(y), holdout)
+        probabilities = softmax(X @ raw_coef.T + raw_intercept)
+        
+        train = ~held_out
+        for j, histogram in enumerate(histograms):
+            histogram.update(X[train, j])
+        confidence = probabilities[train].max(axis=1)
+        confidence_counts += np.bincount(
+            np.minimum((confidence * CONFIDENCE_BINS).astype(np.int64), CONFIDENCE_BINS - 1),
+            minlength=CONFIDENCE_BINS
+        )
+        
+        y_test = y[held_out]
+        test_probabilities = probabilities[held_out]
+        confusion += np.bincount(
+            y_test * n_classes + test_probabilities.argmax(axis=1), minlength=n_classes * n_classes
+        ).reshape(n_classes, n_classes)
+        log_loss_sum -= np.log(np.clip(test_probabilities[np.arange(len(y_test)), y_test], 1e-15, None)).sum()
+    elapsed = time.perf_counter() - start
+    
+    n_test = int(confusion.sum())
+    print(f"Evaluation pass: {total_rows / elapsed:,.0f} rows/s")
+    if n_test:
+        print(f"\nHoldout rows: {n_test}")
+        print(f"Model Accuracy: {np.trace(confusion) / n_test:.4f}")
+        print(f"Log Loss: {log_loss_sum / n_test:.4f}")
+        print("Confusion matrix (rows = true, columns = predicted):")
+        for name, row in zip(CLASS_NAMES, confusion):
+            print(f"  {name:<12} {row.tolist()}")
+    
+    peak = peak_rss_mb()
+    print(f"\nPeak RSS: {peak:.1f} MB" if peak is not None else "\nPeak RSS: unavailable on this platform")
+    
+    # Save the same artifacts as the in-memory path
+    joblib.dump(model, model_path)
+    print(f"Model saved as '{model_path}'")
+    profile = reference_profile_from_counts(
+        FEATURE_NAMES, CLASS_NAMES, moments, histograms, class_counts, confidence_counts
+    )
+    with open(profile_path, "w") as f:
+        json.dump(profile, f, indent=2)
+    print(f"Reference profile saved as '{profile_path}'")
+    
+    return model
+
 if __name__ == "__main__":
-    train_iris_model()
+    parser = argparse.ArgumentParser(description="Train the Iris classification model")
+    parser.add_argument("--data", nargs="+", help="CSV, Parquet or .npy shard paths or glob patterns for out-of-core training")
+    parser.add_argument("--memory-mb", type=int, default=512, help="Approximate memory cap for streamed chunks")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--learning-rate", type=float, default=0.1)
+    parser.add_argument("--alpha", type=float, default=1e-4, help="L2 regularisation strength")
+    parser.add_argument("--holdout", type=float, default=0.1, help="Fraction of rows held out for evaluation")
+    parser.add_argument("--label-column", default="species")
+    parser.add_argument("--output", default="model.pkl")
+    parser.add_argument("--profile-output", default="reference_profile.json",
+                        help="Where to write the drift reference profile that matches --output")
+    args = parser.parse_args()
+    
+    if args.data:
+        paths = sorted(itertools.chain.from_iterable(glob.glob(pattern) or [pattern] for pattern in args.data))
+        train_out_of_core(
+            paths,
+            memory_mb=args.memory_mb,
+            epochs=args.epochs,
+            batch_size=args.batch_size,
+            learning_rate=args.learning_rate,
+            alpha=args.alpha,
+            holdout=args.holdout,
+            label_column=args.label_column,
+            model_path=args.output,
+            profile_path=args.profile_output
+        )
+    else:
+        train_iris_model(model_path=args.output, profile_path=args.profile_output)
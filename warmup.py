@@ -0,0 +1,166 @@
+"""
+Startup warm-up and readiness tracking.
+
+After startup the app pushes synthetic requests through every registered
+inference path (the real HTTP routes via an in-process ASGI call, the gRPC
+server, shadow models, ...) so that lazy imports, first-call NumPy/sklearn
+code paths and pydantic validators are exercised before real traffic arrives.
+The app reports ready only once every step has completed.
+"""
+import asyncio
+import contextvars
+import json
+import os
+import time
+
+import numpy as np
+
+# Set while warm-up requests run so they are kept out of traffic statistics
+in_warmup = contextvars.ContextVar("in_warmup", default=False)
+
+# gRPC metadata key marking warm-up calls for the same purpose
+WARMUP_METADATA = ("x-iris-warmup", "1")
+
+
+class Warmup:
+    """Ordered warm-up steps, their measured latencies and the readiness state"""
+
+    def __init__(self, enabled=True, iterations=20, batch_size=256):
+        self.enabled = enabled
+        self.iterations = iterations
+        self.batch_size = batch_size
+        self.steps = []
+        self.results = {}
+        self.state = "pending" if enabled else "ready"
+        self.error = None
+        self.started_at = None
+        self.duration = None
+
+    @classmethod
+    def from_env(cls):
+        """Build from IRIS_WARMUP, IRIS_WARMUP_ITERATIONS and IRIS_WARMUP_BATCH_SIZE"""
+        return cls(
+            enabled=os.environ.get("IRIS_WARMUP", "1") != "0",
+            iterations=int(os.environ.get("IRIS_WARMUP_ITERATIONS", "20")),
+            batch_size=int(os.environ.get("IRIS_WARMUP_BATCH_SIZE", "256")),
+        )
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def add_step(self, name, func):
+        """Register ``func`` (sync or async, no arguments) as a warm-up step"""
+        self.steps.append((name, func))
+
+    async def run(self):
+        """Run every step ``iterations`` times, recording per-call latency"""
+        if not self.enabled:
+            return
+        self.state = "running"
+        self.started_at = time.time()
+        start = time.perf_counter()
+        token = in_warmup.set(True)
+        try:
+            for name, func in self.steps:
+                latencies = []
+                for _ in range(self.iterations):
+                    call_start = time.perf_counter()
+                    result = func()
+                    if asyncio.iscoroutine(result):
+                        await result
+                    latencies.append(time.perf_counter() - call_start)
+                self.results[name] = _latency_summary(latencies)
+            self.state = "ready"
+        except Exception as e:
+            self.state = "failed"
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            in_warmup.reset(token)
+            self.duration = time.perf_counter() - start
+
+    def status(self):
+        return {
+            "status": self.state,
+            "enabled": self.enabled,
+            "iterations": self.iterations,
+            "batch_size": self.batch_size,
+            "steps": [name for name, _ in self.steps],
+            "duration_ms": None if self.duration is None else self.duration * 1000,
+            "latencies": self.results,
+            "error": self.error,
+        }
+
+
+def _latency_summary(latencies):
+    ms = np.array(latencies) * 1000
+    return {
+        "first_ms": float(ms[0]),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "last_ms": float(ms[-1]),
+    }
+
+
+async def asgi_request(app, method, path, payload=None):
+    """
+    Send one request straight into an ASGI app without a network round trip.
+
+    ``payload`` is sent as JSON, or as-is with an octet-stream content type
+    when it is bytes. Returns (status code, body bytes). Raises RuntimeError unless the app
+    answers 200 with a non-empty body.
+    """
+    if isinstance(payload, bytes):
+        body, content_type = payload, b"application/octet-stream"
+    else:
+        body = b"" if payload is None else json.dumps(payload).encode()
+        content_type = b"application/json"
+    headers = [(b"content-type", content_type), (b"content-length", str(len(body)).encode())]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 0),
+    }
+    received = False
+    response_complete = asyncio.Event()
+    status = None
+    chunks = []
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Like a real client, stay connected until the whole response is sent;
+        # an early disconnect would cancel streaming responses
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_complete.set()
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        response_complete.set()
+    content = b"".join(chunks)
+    if status != 200:
+        raise RuntimeError(f"Warm-up request {method} {path} returned {status}: {content[:200]!r}")
+    if not content:
+        raise RuntimeError(f"Warm-up request {method} {path} returned an empty body")
+    return status, content